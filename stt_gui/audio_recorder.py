@@ -8,6 +8,7 @@ Module for a dialog window that allows users to record audio.
 
 
 import ctypes
+import queue
 #
 import numpy as np
 from PySide2 import QtCore, QtWidgets, QtMultimedia
@@ -17,6 +18,78 @@ from .utils import seconds_to_timestamp
 from .widgets import DecimalSlider
 
 
+# #############################################################################
+# ## DEVICE CACHE
+# #############################################################################
+# Enumerating devices and codecs goes through the platform backend and can
+# block the GUI noticeably, so it is done once and reused across dialogs
+_CACHED_INPUTS = None
+_CACHED_CODECS = None
+
+
+def _get_audio_inputs(recorder):
+    """
+    :param recorder: A ``QAudioRecorder`` used to query the backend, only if
+      nothing has been cached yet.
+    :returns: The pair ``(audio_inputs, audio_codecs)``, as lists of strings.
+    """
+    global _CACHED_INPUTS, _CACHED_CODECS
+    if _CACHED_INPUTS is None:
+        _CACHED_INPUTS = recorder.audioInputs()
+    if _CACHED_CODECS is None:
+        _CACHED_CODECS = recorder.supportedAudioCodecs()
+    return _CACHED_INPUTS, _CACHED_CODECS
+
+
+def _clear_audio_inputs_cache():
+    """
+    Forces the next ``_get_audio_inputs`` call to query the backend again.
+    """
+    global _CACHED_INPUTS, _CACHED_CODECS
+    _CACHED_INPUTS = None
+    _CACHED_CODECS = None
+
+
+# #############################################################################
+# ## PROBE CONSUMER
+# #############################################################################
+class ProbeConsumerThread(QtCore.QThread):
+    """
+    Thread that pops items from ``self.queue`` and passes them, unpacked, to
+    the given ``consume`` callback. This allows the audio probe callbacks,
+    which run on the GUI thread, to just enqueue the raw data and return,
+    while the heavier processing happens here.
+
+    Call ``stop`` to process the remaining items and finish the thread.
+    """
+
+    def __init__(self, consume, parent=None):
+        """
+        :param consume: Callable that receives the unpacked queue items.
+        """
+        super().__init__(parent)
+        self.queue = queue.SimpleQueue()
+        self.consume = consume
+
+    def run(self):
+        """
+        """
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            self.consume(*item)
+
+    def stop(self):
+        """
+        Enqueues the termination sentinel and blocks until all items before
+        it have been consumed.
+        """
+        if self.isRunning():
+            self.queue.put(None)
+            self.wait()
+
+
 # #############################################################################
 # ## AUDIO RECORDER
 # #############################################################################
@@ -26,10 +99,11 @@ class AudioRecorderDialog(QtWidgets.QDialog):
     recording device, information about the ongoing recording, and buttons to
     start/stop/save the recording.
 
-    Each time an audio frame arrives to ``on_audio_probe``, it is appended to
-    the ``self.result`` list. Once we are done with the dialog, we can e.g.
-    concatenate the frames to store the recording, compute their energies to
-    feed an audio meter...
+    Each time an audio frame arrives to ``on_audio_probe``, its raw bytes are
+    sent to a ``ProbeConsumerThread``, which copies the frames into a
+    preallocated buffer at a running offset, so the recording is always
+    stored as a single contiguous array. Once we are done with the dialog, we
+    can e.g. store the recording, compute its energy to feed an audio meter...
 
     Modified from::
       https://doc.qt.io/qt-5/qtmultimedia-multimedia-audiorecorder-example.html
@@ -38,18 +112,27 @@ class AudioRecorderDialog(QtWidgets.QDialog):
     REC_BUTTON_TEXT = "Record"
     PAUSE_BUTTON_TEXT = "Pause"
     ACCEPT_BUTTON_TEXT = "Accept"
+    REFRESH_BUTTON_TEXT = "Refresh devices"
     NUM_DECIMALS_LABEL = 2  # How many decimals are displayed on label
+    # The recording is paused once it surpasses max_allowed_secs, so a few
+    # seconds of headroom prevent reallocating the buffer in that case
+    BUFFER_HEADROOM_SECS = 5
 
     @classmethod
     def record_audio(cls, parent=None, max_allowed_secs=600):
         """
+        :returns: If the user records and accepts, the triple ``(arr,
+          sample_rate, (mean, absmax))``, where the statistics are gathered
+          during recording (see ``mean`` and ``absmax``). Otherwise
+          ``(None, None, None)``.
         """
         dialog = cls(parent, max_allowed_secs)
         was_accepted = bool(dialog.exec_())
-        if was_accepted:
-            return dialog.result, dialog.sample_rate
+        if was_accepted and dialog._buf is not None:
+            return (dialog.result, dialog.sample_rate,
+                    (dialog.mean, dialog.absmax))
         else:
-            return [], None
+            return None, None, None
 
     def __init__(self, parent=None, max_allowed_secs=600):
         """
@@ -66,12 +149,55 @@ class AudioRecorderDialog(QtWidgets.QDialog):
         self.audio_probe = QtMultimedia.QAudioProbe(self)
         self.audio_probe.setSource(self.audio_recorder)
         self.audio_probe.audioBufferProbed.connect(self.on_audio_probe)
+        # probed frames are stored off the GUI thread
+        self.probe_consumer = ProbeConsumerThread(self._store_frames, self)
+        self.rejected.connect(self.probe_consumer.stop)
+        self.probe_consumer.start()
         #
         self._setup_gui()
         #
         self.vol_s.setValue(100)
-        self.result = []
+        # the buffer is allocated on the first probe, once dtype and sample
+        # rate are known
+        self._buf = None
+        self._write_idx = 0
         self.sample_rate = -1
+        self._fmt_cache = {}
+        self._last_dur_rounded = -1.0
+        # running statistics, so that normalization doesn't need extra passes
+        # over the whole recording once it's done
+        self._running_sum = 0.0
+        self._running_n = 0
+        self._running_max = float("-inf")
+        self._running_min = float("inf")
+
+    @property
+    def result(self):
+        """
+        :returns: A view of the contiguous array with all samples recorded so
+          far (``None`` if nothing was recorded).
+        """
+        if self._buf is not None:
+            return self._buf[:self._write_idx]
+
+    @property
+    def mean(self):
+        """
+        :returns: The mean of all samples recorded so far.
+        """
+        return self._running_sum / max(self._running_n, 1)
+
+    @property
+    def absmax(self):
+        """
+        :returns: The maximal absolute value of the recording so far, once
+          its mean has been subtracted (i.e. the peak of the centered
+          recording). Zero if nothing has been recorded.
+        """
+        if self._running_n == 0:
+            return 0.0
+        mean = self.mean
+        return max(self._running_max - mean, mean - self._running_min)
 
     def _setup_body(self, lyt):
         """
@@ -79,16 +205,22 @@ class AudioRecorderDialog(QtWidgets.QDialog):
         self.form = QtWidgets.QFormLayout()
         lyt.addLayout(self.form)
         #
+        audio_inputs, audio_codecs = _get_audio_inputs(self.audio_recorder)
         # audio devices
         self.devices_cbox = QtWidgets.QComboBox()
-        self.devices_cbox.addItems(self.audio_recorder.audioInputs())
+        self.devices_cbox.addItems(audio_inputs)
         self.form.addRow("Input Device:", self.devices_cbox)
         self.devices_cbox.currentTextChanged.connect(
             lambda txt: self.audio_recorder.setAudioInput(txt))
         # audio codecs
         self.codecs_cbox = QtWidgets.QComboBox()
-        self.codecs_cbox.addItems(self.audio_recorder.supportedAudioCodecs())
+        self.codecs_cbox.addItems(audio_codecs)
         self.form.addRow("Audio Codec:", self.codecs_cbox)
+        # devices are cached, so allow re-querying them explicitly
+        self.refresh_b = QtWidgets.QPushButton(self.REFRESH_BUTTON_TEXT)
+        self.refresh_b.setAutoDefault(False)
+        self.form.addRow("", self.refresh_b)
+        self.refresh_b.clicked.connect(self.on_refresh_devices)
         # (ignored sample rate and containers)
         # volume
         self.vol_s = DecimalSlider(0, 1, 3, QtCore.Qt.Horizontal)
@@ -128,6 +260,11 @@ class AudioRecorderDialog(QtWidgets.QDialog):
         """
         """
         dur_secs = dur / 1000.0
+        # only update the label if the displayed text would change
+        rounded = round(dur_secs, self.NUM_DECIMALS_LABEL)
+        if rounded == self._last_dur_rounded:
+            return
+        self._last_dur_rounded = rounded
         pos_txt = seconds_to_timestamp(dur_secs, self.NUM_DECIMALS_LABEL)
         self.dur_l.setText(pos_txt)
         if dur_secs > self.max_allowed_secs:
@@ -144,6 +281,21 @@ class AudioRecorderDialog(QtWidgets.QDialog):
             else:
                 self.reject()
 
+    def on_refresh_devices(self):
+        """
+        Clears the device cache and repopulates the combo boxes, keeping the
+        current selections if they are still available.
+        """
+        _clear_audio_inputs_cache()
+        audio_inputs, audio_codecs = _get_audio_inputs(self.audio_recorder)
+        for cbox, items in ((self.devices_cbox, audio_inputs),
+                            (self.codecs_cbox, audio_codecs)):
+            current = cbox.currentText()
+            cbox.clear()
+            cbox.addItems(items)
+            if current in items:
+                cbox.setCurrentText(current)
+
     def on_status_changed(self, status):
         """
         """
@@ -157,6 +309,8 @@ class AudioRecorderDialog(QtWidgets.QDialog):
         """
         self.audio_recorder.stop()  # stop automatically saves to disk!
         final_duration = self.audio_recorder.duration()
+        # make sure all probed frames are in the buffer
+        self.probe_consumer.stop()
 
     def on_toggle_rec(self):
         """
@@ -167,29 +321,44 @@ class AudioRecorderDialog(QtWidgets.QDialog):
         else:
             self.audio_recorder.record()
 
-    @staticmethod
-    def get_buffer_info(buf):
+    def get_buffer_info(self, buf):
         """
+        :returns: The tuple ``(dtype, num_bytes, num_frames, bytes_per_frame,
+          sample_rate)`` for the given ``QAudioBuffer``.
+
+        The format-dependent part is cached per ``(sample_type,
+        bytes_per_frame, sample_rate)``, since the format doesn't change
+        during a recording session.
         """
         num_bytes = buf.byteCount()
         num_frames = buf.frameCount()
         #
         fmt = buf.format()
-        sample_type = fmt.sampleType()  # float, int, uint
-        bytes_per_frame = fmt.bytesPerFrame()
-        sample_rate = fmt.sampleRate()
-        #
-        if sample_type == fmt.Float and bytes_per_frame == 2:
-            dtype = np.float32
-            ctype = ctypes.c_float
-        elif sample_type == fmt.SignedInt and bytes_per_frame == 2:
-            dtype = np.int16
-            ctype = ctypes.c_int16
-        elif sample_type == fmt.UnsignedInt and bytes_per_frame == 2:
-            dtype = np.uint16
-            ctype = ctypes.c_uint16
+        key = (fmt.sampleType(), fmt.bytesPerFrame(), fmt.sampleRate())
+        dtype = self._fmt_cache.get(key)
+        if dtype is None:
+            sample_type, bytes_per_frame, _ = key  # float, int, uint
+            if sample_type == fmt.Float and bytes_per_frame == 2:
+                dtype = np.float32
+            elif sample_type == fmt.SignedInt and bytes_per_frame == 2:
+                dtype = np.int16
+            elif sample_type == fmt.UnsignedInt and bytes_per_frame == 2:
+                dtype = np.uint16
+            self._fmt_cache[key] = dtype
+        _, bytes_per_frame, sample_rate = key
         #
-        return dtype, ctype, num_bytes, num_frames, bytes_per_frame, sample_rate
+        return dtype, num_bytes, num_frames, bytes_per_frame, sample_rate
+
+    @staticmethod
+    def pointer_address(cdata):
+        """
+        :param cdata: The ``constData()`` of a ``QAudioBuffer``.
+        :returns: The memory address of the data, as an integer.
+
+        ``cdata`` is a ``shiboken2.VoidPtr``, which converts to its address
+        directly via ``__int__``.
+        """
+        return int(cdata)
 
     def on_audio_probe(self, audio_buffer):
         """
@@ -205,11 +374,36 @@ class AudioRecorderDialog(QtWidgets.QDialog):
         # layers, so although it works, it is not stable and may break
         # somewhere, sometimes.
         cdata = audio_buffer.constData()
-        (dtype, ctype, num_bytes, num_frames,
+        (dtype, num_bytes, num_frames,
          bytes_per_frame, sample_rate) = self.get_buffer_info(audio_buffer)
-        pointer_addr_str = str(cdata).split("Address ")[1].split(", Size")[0]
-        pointer_addr = int(pointer_addr_str, 16)
-        arr = np.array((ctype * num_frames).from_address(pointer_addr)).copy()
-        #
-        self.result.append(arr)
+        pointer_addr = self.pointer_address(cdata)
+        # The Qt buffer is invalid once this callback returns, so take a single
+        # memcpy of the bytes and leave the rest to the consumer thread
+        raw = ctypes.string_at(pointer_addr, num_bytes)
+        self.probe_consumer.queue.put((raw, dtype, num_frames, sample_rate))
+
+    def _store_frames(self, raw, dtype, num_frames, sample_rate):
+        """
+        Runs on the ``ProbeConsumerThread``. Copies the given raw frames into
+        ``self._buf`` at the current write position. The buffer is allocated
+        on the first call with room for ``max_allowed_secs`` of audio (plus
+        some headroom), and only grows if that is surpassed.
+        """
+        arr = np.frombuffer(raw, dtype=dtype, count=num_frames)
+        n = len(arr)
+        if self._buf is None:
+            max_secs = self.max_allowed_secs + self.BUFFER_HEADROOM_SECS
+            self._buf = np.empty(max(int(max_secs * sample_rate), n),
+                                 dtype=arr.dtype)
+        end = self._write_idx + n
+        if end > len(self._buf):
+            self._buf = np.resize(self._buf, max(end, 2 * len(self._buf)))
+        np.copyto(self._buf[self._write_idx:end], arr, casting="unsafe")
+        self._write_idx = end
         self.sample_rate = sample_rate
+        # update running statistics while the frames are hot in cache
+        if n > 0:
+            self._running_sum += float(arr.sum())
+            self._running_n += n
+            self._running_max = max(self._running_max, float(arr.max()))
+            self._running_min = min(self._running_min, float(arr.min()))
@@ -104,21 +104,27 @@ class TextDocumentUndoWrapperCommand(QtWidgets.QUndoCommand):
     """
     This command is a wrapper that simply uses the text document stack, but
     allows to register the action on a different stack for integration.
+    A single wrapper can stand for ``num_cmds`` consecutive document commands.
     More info::
       https://stackoverflow.com/a/67388173/4511978
     """
 
     COMMAND_NAME = "Text Changes"
 
-    def __init__(self, txt_editor, parent=None):
+    def __init__(self, txt_editor, num_cmds=1, parent=None):
         super().__init__(self.COMMAND_NAME, parent)
         self.txt_editor = txt_editor
+        self.num_cmds = num_cmds
 
     def undo(self):
-        self.txt_editor.document().undo()
+        doc = self.txt_editor.document()
+        for _ in range(self.num_cmds):
+            doc.undo()
 
     def redo(self):
-        self.txt_editor.document().redo()
+        doc = self.txt_editor.document()
+        for _ in range(self.num_cmds):
+            doc.redo()
 
 
 # #############################################################################
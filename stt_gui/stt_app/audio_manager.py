@@ -18,8 +18,6 @@ selected one, and can be used for arbitrary operations on them.
 
 import os
 #
-import numpy as np
-import librosa
 from PySide2 import QtCore, QtWidgets
 #
 from ..audio_player import AudioPlayer
@@ -28,6 +26,30 @@ from ..utils import recursive_delete_qt
 from ..widgets import ScrollbarList
 
 
+# #############################################################################
+# ## HELPERS
+# #############################################################################
+def _normalize_inplace(arr):
+    """
+    Subtracts the mean from the given float array and scales it so that its
+    maximal absolute value is 1. Everything happens in-place: for float32 and
+    float64 arrays, the peak is located via the BLAS ``i?amax`` kernel, which
+    avoids materializing the ``abs(arr)`` temporary. Silent arrays are only
+    centered.
+    """
+    from scipy.linalg import blas
+    #
+    arr -= arr.mean()
+    iamax = {"f": blas.isamax, "d": blas.idamax}.get(arr.dtype.char)
+    if iamax is not None:
+        peak = abs(arr[iamax(arr)])  # scipy's i?amax is zero-indexed
+    else:
+        peak = max(arr.max(), -arr.min())
+    if peak > 0:
+        arr /= peak
+    return arr
+
+
 # #############################################################################
 # ## AUDIO ELEMENT
 # #############################################################################
@@ -100,6 +122,7 @@ class AudioManager(ScrollbarList):
         #
         self.sel_group = QtWidgets.QButtonGroup(self)
         self.sel_group.buttonPressed.connect(self.on_selected)
+        self._button_to_audio = {}
         #
         self.player = AudioPlayer(parent=self,
                                   bw_delta_secs=delta_secs,
@@ -116,8 +139,7 @@ class AudioManager(ScrollbarList):
         :returns: A list in form ``[(b, a), ...]`` where b is the select
           button and a the corresponding AudioElement widget.
         """
-        result = [(x.itemAt(0).widget(), x.itemAt(1).widget())
-                  for i, x in enumerate(self.list_layout.children())]
+        result = list(self._button_to_audio.items())
         return result
 
     def get_selected(self):
@@ -126,10 +148,8 @@ class AudioManager(ScrollbarList):
           returns the selected ``(button, AudioElement)`` pair.
         """
         checked_b = self.sel_group.checkedButton()
-        selected = [(b, aud) for b, aud in self.button_audio_list()
-              if b is checked_b]
-        if selected:
-            return selected[0]
+        if checked_b in self._button_to_audio:
+            return checked_b, self._button_to_audio[checked_b]
 
     def on_selected(self, button):
         """
@@ -137,8 +157,7 @@ class AudioManager(ScrollbarList):
         the player.
         """
         # get selected audio element
-        ba_list = self.button_audio_list()
-        sel_aud = [aud for b, aud in ba_list if (b is button)][0]
+        sel_aud = self._button_to_audio[button]
         # assign audio stream to player and update widgets
         self.player.set_array(sel_aud.arr, sel_aud.sr)
         # self.player.set_media_stream(sel_aud.qstream)
@@ -183,6 +202,7 @@ class AudioManager(ScrollbarList):
         :param widget: The element to be added.
         Adds given widget to the central list, surrounded by Select and
         Delete buttons, which allow users to edit the list dynamically.
+        :returns: The Select button for the added widget.
         """
         # create entry layout
         lyt = QtWidgets.QVBoxLayout() if self.horizontal \
@@ -199,11 +219,17 @@ class AudioManager(ScrollbarList):
         lyt.addWidget(del_b)
         #
         self.list_layout.addLayout(lyt)
+        self._button_to_audio[sel_b] = widget
+        return sel_b
 
     def delete_element(self, element):
         """
         Used by the Delete buttons in add_element
         """
+        sel_b = element.itemAt(0).widget()
+        self._button_to_audio.pop(sel_b, None)
+        self.sel_group.removeButton(sel_b)
+        #
         layout_idx = self.list_layout.indexOf(element)
         elt = self.list_layout.takeAt(layout_idx)
         recursive_delete_qt(elt)
@@ -216,18 +242,25 @@ class AudioManager(ScrollbarList):
             parent=self, dir=self.dirpath, filter=self.filter)
         if filepath:
             filename = os.path.basename(filepath)
-            # gather audio data/metadata from path
-            arr, sr = librosa.load(filepath, sr=None)
-            arr -= arr.mean()
-            arr /= abs(arr).max()
+            # gather audio data/metadata from path. Libsndfile decodes the
+            # usual formats natively, librosa is only needed for the rest
+            # (e.g. mp3 on older libsndfile versions)
+            import soundfile
+            try:
+                arr, sr = soundfile.read(filepath, dtype="float32",
+                                         always_2d=False)
+                if arr.ndim == 2:
+                    arr = arr.mean(axis=1)
+            except RuntimeError:
+                import librosa
+                arr, sr = librosa.load(filepath, sr=None)
+            _normalize_inplace(arr)
             url = QtCore.QUrl.fromLocalFile(filepath)
             # create audio entry object
             aud = AudioElement(name=filename, arr=arr, sr=sr,
                                url=url, parent=self, horizontal=True)
-            self.add_element(aud)
-            # at this point the new (button, widget) is present in the list.
-            # find the button and click it to select loaded audio
-            ae_button = [b for b, a in self.button_audio_list() if a is aud][0]
+            # add entry to the list and click its button to select it
+            ae_button = self.add_element(aud)
             ae_button.click()
             # finally if all went well update dialog dirpath
             self.dirpath = os.path.dirname(filepath)
@@ -240,13 +273,22 @@ class AudioManager(ScrollbarList):
         :returns: If user records AND accepts, returns float32 numpy array with
           the audio recording, and the sample rate.
         """
-        rec_outcome, sr = AudioRecorderDialog.record_audio(self)
-        if rec_outcome:  # True only if accepted
-            rec_outcome = np.concatenate(rec_outcome).astype(np.float32)
+        import numpy as np
+        #
+        rec_outcome, sr, stats = AudioRecorderDialog.record_audio(self)
+        if rec_outcome is not None:  # True only if accepted
             if normalize:
-                rec_outcome -= rec_outcome.mean()
-                rec_outcome /= abs(rec_outcome).max()
-            return rec_outcome, sr
+                # mean and peak were gathered during recording on the native
+                # (e.g. int16) samples, so the float32 conversion is fused
+                # with the centering, and followed by a single scaling pass
+                mean, absmax = stats
+                arr = np.empty(len(rec_outcome), dtype=np.float32)
+                np.subtract(rec_outcome, mean, out=arr, dtype=np.float32)
+                if absmax > 0:
+                    np.multiply(arr, 1.0 / absmax, out=arr)
+            else:
+                arr = rec_outcome.astype(np.float32)
+            return arr, sr
 
     def record_audio(self, normalize=True):
         """
@@ -258,8 +300,6 @@ class AudioManager(ScrollbarList):
             self._recording_idx += 1
             aud = AudioElement(f"Recording{self._recording_idx}",
                                arr, sr, parent=self, horizontal=True)
-            self.add_element(aud)
-            # at this point the new (button, widget) is present in the list.
-            # find the button and click it to select loaded audio
-            ae_button = [b for b, a in self.button_audio_list() if a is aud][0]
+            # add entry to the list and click its button to select it
+            ae_button = self.add_element(aud)
             ae_button.click()
@@ -8,6 +8,8 @@ widgets, the ``MainWindow`` class.
 """
 
 
+from operator import attrgetter
+#
 from PySide2 import QtCore, QtWidgets, QtGui
 #
 from .dialogs import InstructionsDialog, AboutDialog, KeymapsDialog
@@ -59,11 +61,12 @@ class MainWindow(QtWidgets.QMainWindow):
         wtt_silero_prof.AUDIO_MANAGER = self.audio_manager
         self.profiles = ProfileList(
             self, [wtt_silero_prof, to_upper_prof, to_lower_prof])
-        #
-        self.instructions_dialog = InstructionsDialog()
-        self.about_dialog = AboutDialog()
-        self.keymaps_dialog = KeymapsDialog(
-            {k: v.toString() for k, v in self.keymaps().items()})
+        # keymaps are computed once and shared by the dialog and the actions
+        self._keymaps = self.keymaps()
+        # help dialogs are rarely needed, so they are created on first show
+        self.instructions_dialog = None
+        self.about_dialog = None
+        self.keymaps_dialog = None
         # # create main layout, add controller and graphics:
         self.main_splitter = QtWidgets.QSplitter()
         self.main_splitter.setOrientation(QtCore.Qt.Horizontal)
@@ -74,18 +77,49 @@ class MainWindow(QtWidgets.QMainWindow):
         self.setCentralWidget(self.main_splitter)
         #
         self._setup_menu_bar()
-        self._add_keymaps()
         #
-        self.text_editor.eventCatched.connect(self.on_catched_editor_event)
+        # both live in the GUI thread, so connect directly
+        self.text_editor.eventCatched.connect(self.on_catched_editor_event,
+                                              QtCore.Qt.DirectConnection)
 
-    def on_catched_editor_event(self, evt):
+    @QtCore.Slot(int, int, str)
+    def on_catched_editor_event(self, key, modifiers, text):
         """
         The ``TextEditor`` includes functionality to bypass built-in key events.
         Whenever they are bypassed, they land here and  our custom keybindings
         will be able to catch it.
+
+        The editor only sends the key, modifiers and text of the caught key
+        press, so the event is rebuilt here. Note that the event is dispatched
+        via ``sendEvent`` rather than by calling ``self.event`` directly, since
+        the latter would skip the application-level event filters and
+        notification.
+        """
+        evt = QtGui.QKeyEvent(QtCore.QEvent.KeyPress, key,
+                              QtCore.Qt.KeyboardModifiers(modifiers), text)
+        QtCore.QCoreApplication.sendEvent(self, evt)
+
+    def _show_instructions(self):
+        """
+        """
+        if self.instructions_dialog is None:
+            self.instructions_dialog = InstructionsDialog()
+        self.instructions_dialog.show()
+
+    def _show_about(self):
+        """
+        """
+        if self.about_dialog is None:
+            self.about_dialog = AboutDialog()
+        self.about_dialog.show()
+
+    def _show_keymaps(self):
+        """
         """
-        if evt.type() == QtCore.QEvent.KeyPress:
-            QtCore.QCoreApplication.sendEvent(self, evt)
+        if self.keymaps_dialog is None:
+            self.keymaps_dialog = KeymapsDialog(
+                {k: v.toString() for k, v in self._keymaps.items()})
+        self.keymaps_dialog.show()
 
     def _setup_undo(self):
         """
@@ -96,48 +130,63 @@ class MainWindow(QtWidgets.QMainWindow):
         self.undo_view.setWindowTitle("Undo View")
         self.undo_view.setAttribute(QtCore.Qt.WA_QuitOnClose, False)
 
+    # Menu bar contents, in the form ``(attr_name, label, get_slot)``, where
+    # ``get_slot`` is an ``operator.attrgetter`` (built once, here) that
+    # resolves the slot from ``self``, and ``None`` entries denote separators.
+    # If ``label`` is a key of ``keymaps``, the corresponding shortcut is
+    # assigned to the action
+    _EDIT_ACTIONS = (
+        ("open_txt_action", "Open text",
+         attrgetter("text_editor.load_dialog")),
+        ("save_txt_action", "Save text",
+         attrgetter("text_editor.save_dialog")),
+        ("quicksave_txt_action", "Quicksave text",
+         attrgetter("text_editor.quicksave")),
+        None,
+        ("undo_action", "Undo", attrgetter("undo_stack.undo")),
+        ("redo_action", "Redo", attrgetter("undo_stack.redo")),
+        None,
+        ("view_undo_action", "View undo stack", attrgetter("undo_view.show")))
+    _RUN_ACTIONS = (
+        ("run_selected_profile", "Run selected profile",
+         attrgetter("profiles.run_selected")),
+        None,
+        ("toggle_play_action", "Toggle play/pause",
+         attrgetter("audio_manager.player.play_b.click")),
+        ("bw_action", "Seek player back <<",
+         attrgetter("audio_manager.player.bw_b.click")),
+        ("fw_action", "Seek player forward >>",
+         attrgetter("audio_manager.player.fw_b.click")),
+        ("record_action", "Record audio",
+         attrgetter("audio_manager.record_b.click")))
+    _HELP_ACTIONS = (
+        ("keyboard_shortcuts", "Keyboard shortcuts",
+         attrgetter("_show_keymaps")),
+        ("instructions", "Instructions", attrgetter("_show_instructions")),
+        ("about", "About", attrgetter("_show_about")))
+
     def _setup_menu_bar(self):
         """
-        Set up menu bar: create actions and connect them to methods.
-        """
-        # edit menu
-        edit_menu = self.menuBar().addMenu("Edit")
-        self.open_txt_action = edit_menu.addAction("Open text")
-        self.open_txt_action.triggered.connect(self.text_editor.load_dialog)
-        self.save_txt_action = edit_menu.addAction("Save text")
-        self.save_txt_action.triggered.connect(self.text_editor.save_dialog)
-        self.quicksave_txt_action = edit_menu.addAction("Quicksave text")
-        self.quicksave_txt_action.triggered.connect(self.text_editor.quicksave)
-        edit_menu.addSeparator()
-        self.undo_action = edit_menu.addAction("Undo")
-        self.undo_action.triggered.connect(self.undo_stack.undo)
-        self.redo_action = edit_menu.addAction("Redo")
-        self.redo_action.triggered.connect(self.undo_stack.redo)
-        edit_menu.addSeparator()
-        self.view_undo_action = edit_menu.addAction("View undo stack")
-        self.view_undo_action.triggered.connect(self.undo_view.show)
-        # run menu
-        run_menu = self.menuBar().addMenu("Run")
-        self.run_selected_profile = run_menu.addAction("Run selected profile")
-        self.run_selected_profile.triggered.connect(self.profiles.run_selected)
-        run_menu.addSeparator()
-        self.toggle_play_action = run_menu.addAction("Toggle play/pause")
-        self.toggle_play_action.triggered.connect(
-            self.audio_manager.player.play_b.click)
-        self.bw_action = run_menu.addAction("Seek player back <<")
-        self.bw_action.triggered.connect(self.audio_manager.player.bw_b.click)
-        self.fw_action = run_menu.addAction("Seek player forward >>")
-        self.fw_action.triggered.connect(self.audio_manager.player.fw_b.click)
-        self.record_action = run_menu.addAction("Record audio")
-        self.record_action.triggered.connect(self.audio_manager.record_b.click)
-        # help menu
-        help_menu = self.menuBar().addMenu("Help")
-        self.keyboard_shortcuts = help_menu.addAction("Keyboard shortcuts")
-        self.keyboard_shortcuts.triggered.connect(self.keymaps_dialog.show)
-        self.instructions = help_menu.addAction("Instructions")
-        self.instructions.triggered.connect(self.instructions_dialog.show)
-        self.about = help_menu.addAction("About")
-        self.about.triggered.connect(self.about_dialog.show)
+        Set up menu bar: create actions, connect them to methods and assign
+        the shortcuts defined in ``keymaps``, all in a single pass.
+        """
+        km = self._keymaps
+        menu_bar = self.menuBar()
+        for menu_name, table in (("Edit", self._EDIT_ACTIONS),
+                                 ("Run", self._RUN_ACTIONS),
+                                 ("Help", self._HELP_ACTIONS)):
+            menu = menu_bar.addMenu(menu_name)
+            for row in table:
+                if row is None:
+                    menu.addSeparator()
+                    continue
+                attr, label, get_slot = row
+                act = menu.addAction(label)
+                act.triggered.connect(get_slot(self))
+                shortcut = km.get(label)
+                if shortcut is not None:
+                    act.setShortcut(shortcut)
+                setattr(self, attr, act)
 
     def keymaps(self):
         """
@@ -145,7 +194,8 @@ class MainWindow(QtWidgets.QMainWindow):
 
         Define this GUI's specific key mappings. Note that this method can
         be overriden to return a different mapping, but the ``name``s have
-        to remain identical, in order to be recognized by ``_add_keymaps``.
+        to remain identical to the menu labels, in order to be recognized by
+        ``_setup_menu_bar``.
         """
         d = {
             "Undo": QtGui.QKeySequence("Ctrl+Z"),
@@ -164,25 +214,3 @@ class MainWindow(QtWidgets.QMainWindow):
             "Record audio": QtGui.QKeySequence("Ctrl+R")
         }
         return d
-
-    def _add_keymaps(self):
-        """
-        This function is closely connected to ``keymaps``. There, the
-        shortcuts are defined, here, they are applied.
-        """
-        km = self.keymaps()
-        # add menu shortcuts
-        self.save_txt_action.setShortcut(km["Save text"])
-        self.quicksave_txt_action.setShortcut(km["Quicksave text"])
-        self.open_txt_action.setShortcut(km["Open text"])
-        #
-        self.undo_action.setShortcut(km["Undo"])
-        self.redo_action.setShortcut(km["Redo"])
-        self.view_undo_action.setShortcut(km["View undo stack"])
-        #
-        self.run_selected_profile.setShortcut(km["Run selected profile"])
-
-        self.toggle_play_action.setShortcut(km["Toggle play/pause"])
-        self.bw_action.setShortcut(km["Seek player back <<"])
-        self.fw_action.setShortcut(km["Seek player forward >>"])
-        self.record_action.setShortcut(km["Record audio"])
@@ -79,6 +79,9 @@ ones for examples):
 
 
 import time
+import contextlib
+import traceback
+import multiprocessing
 #
 from PySide2 import QtWidgets, QtCore
 #
@@ -88,6 +91,41 @@ from ...dialogs import FlexibleDialog
 from ...utils import recursive_delete_qt
 
 
+# #############################################################################
+# ## MULTIPROCESSING
+# #############################################################################
+# Connection to the parent worker, only set inside worker processes
+_PROGRESS_CONN = None
+
+
+def report_progress(val):
+    """
+    :param val: Integer progress value.
+
+    To be called by the ``run`` of a ``USE_MULTIPROCESSING`` worker, which has
+    no access to the worker object: forwards the value to the worker's
+    ``update_progress`` in the parent process. Does nothing if not called
+    within a worker process.
+    """
+    if _PROGRESS_CONN is not None:
+        _PROGRESS_CONN.send(("progress", val))
+
+
+def _process_entry(conn, run_fn, args, kwargs):
+    """
+    Target of the worker processes: runs ``run_fn(*args, **kwargs)`` and
+    sends the result (or the formatted exception) back through ``conn``.
+    """
+    global _PROGRESS_CONN
+    _PROGRESS_CONN = conn
+    try:
+        msg = ("result", run_fn(*args, **kwargs))
+    except Exception:
+        msg = ("error", traceback.format_exc())
+    conn.send(msg)
+    conn.close()
+
+
 # #############################################################################
 # ## PROFILE LIST
 # #############################################################################
@@ -104,19 +142,30 @@ class ProfileList(ScrollbarList):
 
     Then, if the list is exposed to the users, they will be able to create,
     remove, select and run selected profiles through the GUI.
+
+    All profile workers are run on ``_pool``, a thread pool shared by all
+    profiles, so threads are reused across runs.
     """
 
-    def __init__(self, parent, profiles=[]):
+    _pool = QtCore.QThreadPool.globalInstance()
+
+    def __init__(self, parent, profiles=[], max_threads=None):
         """
         :param profiles: A collection of ``Profile`` classes (not instances).
           They must provide a parameterless constructor, and a parameterless
           ``run()`` method.
+        :param max_threads: If given, maximal number of workers that can run
+          concurrently on the shared pool. Otherwise the Qt default (number
+          of CPU cores) is used.
         """
+        if max_threads is not None:
+            self._pool.setMaxThreadCount(max_threads)
         self.profile_names = [p.NAME for p in profiles]
         self.profiles = profiles
         super().__init__(parent, horizontal=False)
         #
         self.sel_group = QtWidgets.QButtonGroup(self)
+        self._btn_to_profile = {}
         #
         self.run_b = QtWidgets.QPushButton("Run Selected")
         self.run_b.pressed.connect(self.run_selected)
@@ -147,6 +196,7 @@ class ProfileList(ScrollbarList):
         # add "select" and "delete" buttons
         sel_b = QtWidgets.QRadioButton("Select")
         self.sel_group.addButton(sel_b)
+        self._btn_to_profile[sel_b] = profile
         profile.left_layout.addWidget(sel_b)
         remove_b = QtWidgets.QPushButton("Delete")
         profile.left_layout.addWidget(remove_b)
@@ -159,16 +209,23 @@ class ProfileList(ScrollbarList):
     def delete_profile(self, profile):
         """
         """
+        for sel_b, p in list(self._btn_to_profile.items()):
+            if p is profile:
+                del self._btn_to_profile[sel_b]
+                self.sel_group.removeButton(sel_b)
+        #
         layout_idx = self.list_layout.indexOf(profile)
         p = self.list_layout.takeAt(layout_idx)
         recursive_delete_qt(p)
+        # destroying the C++ object also drops all its (and its children's)
+        # connections, so nothing keeps the deleted profile alive
+        profile.deleteLater()
 
     def run_selected(self):
         """
         """
-        selected = self.sel_group.checkedButton()
-        if selected is not None:
-            profile = selected.parent()
+        profile = self._btn_to_profile.get(self.sel_group.checkedButton())
+        if profile is not None:
             profile.run()
 
 
@@ -193,6 +250,11 @@ class Profile(QtWidgets.QWidget):
     :cvar list SIGNATURE: Input to this profile's ``NamedForm``
     """
 
+    # worker signals are always emitted from a pool thread, and each slot
+    # must be connected only once
+    WORKER_CONNECTION = QtCore.Qt.ConnectionType(
+        QtCore.Qt.QueuedConnection | QtCore.Qt.UniqueConnection)
+
     NAME = "Example Profile"
     SIGNATURE = [("max_length", StrLenSpinBox, 10),
                  ("P-value", PvalueSpinBox, 0.5),
@@ -220,24 +282,36 @@ class Profile(QtWidgets.QWidget):
         # and finally populate left/right layouts
         self.setup_left(self.left_layout)
         self.setup_right(self.right_layout)
+        # references to the workers in flight, released once they are done
+        self._running_workers = {}
+        self._current_worker = None
 
     def run_worker(self, worker, dialog=None):
         """
         """
-        # worker will be on a different thread, so we connect it to
+        # worker will emit from a different thread, so we connect it to
         # send the results to the appropriate destiny
+        conn = self.WORKER_CONNECTION
+        # dialogs poll the progress instead of receiving progressSignal, so
+        # it is only emitted if something else is connected to it
+        worker._emit_progress = (
+            dialog is None and
+            worker.receivers(QtCore.SIGNAL("progressSignal(int)")) > 0)
         if dialog is None:
             # if no dialog given, directly run on_accept with results
-            worker.resultSignal.connect(self.on_accept)
+            worker.resultSignal.connect(self.on_accept, conn)
         else:
-            worker.resultSignal.connect(dialog.on_finished_worker)
-            worker.progressSignal.connect(dialog.update_progress)
-            dialog.abortWorkerSignal.connect(worker.abort)
-        # move worker to a thread, start worker and open this dialog
-        thread = worker.thread
-        worker.moveToThread(thread)
-        thread.started.connect(worker.wrapped_run)
-        thread.start()
+            worker.resultSignal.connect(dialog.on_finished_worker, conn)
+            # aborting just flips a flag, so it can be done right away
+            dialog.abortWorkerSignal.connect(worker.abort,
+                                             QtCore.Qt.DirectConnection)
+        # once the worker is done, release it without blocking the GUI
+        worker.resultSignal.connect(self._on_worker_done, conn)
+        # run worker on the shared thread pool and open this dialog
+        runnable = ProfileRunnable(worker)
+        self._running_workers[worker] = runnable
+        self._current_worker = worker
+        ProfileList._pool.start(runnable)
         if dialog is not None:
             dialog_ok = dialog.exec_()
             if not dialog_ok:
@@ -245,13 +319,19 @@ class Profile(QtWidgets.QWidget):
         # When the worker is done, it will trigger the "on_finished_worker"
         # method: if user accepts results, they will be sent back to
         # profile.on_accept for final processing.
-        # Now it's time to close the thread. The standard way of doing that
-        # is calling quit, then wait.
-        thread.quit()
-        successful_thread = thread.wait()
-        if not successful_thread:
-            print("WARNING: thread wasn't closed successfully, ",
-                  "this may lead to segfaults")
+
+    @QtCore.Slot(object)
+    def _on_worker_done(self, result):
+        """
+        Releases the worker that emitted the result and schedules it for
+        deletion.
+        """
+        worker = self.sender()
+        self._running_workers.pop(worker, None)
+        if worker is self._current_worker:
+            self._current_worker = None
+        if worker is not None:
+            worker.deleteLater()
 
     def setup_right(self, lyt):
         """
@@ -291,7 +371,7 @@ class Profile(QtWidgets.QWidget):
 class ProfileWorker(QtCore.QObject):
     """
     This class is a Qt functor designed to be run by the ``ProfileDialog``
-    on a different thread via the ``dialog.run_worker(w)`` method. To
+    on a pooled thread via the ``dialog.run_worker(w)`` method. To
     extend this class, simply override the ``run() -> result`` method and
     provide any ``*args, **kwargs`` used in run to the constructor.
 
@@ -302,7 +382,28 @@ class ProfileWorker(QtCore.QObject):
       if self._abort:
           return
       self.update_progress(i)
+
+    CPU-bound jobs written in pure Python can set ``USE_MULTIPROCESSING``, to
+    be run on a separate process and avoid holding the GIL away from the GUI.
+    In that case, ``run`` must be a ``staticmethod``, and its arguments and
+    result picklable. Progress can be reported from it via the module-level
+    ``report_progress``. Aborting terminates the process, and the result is
+    then ``None``.
+
+    :cvar USE_MULTIPROCESSING: See above.
+    :cvar ABORT_POLL_SECS: When using multiprocessing, how often the abort
+      flag is checked while waiting for the process.
+    :cvar MAX_PROGRESS_HZ: ``update_progress`` emits at most this many times
+      per second (except for the final value), to avoid flooding the GUI.
     """
+    USE_MULTIPROCESSING = False
+    ABORT_POLL_SECS = 0.1
+    MAX_PROGRESS_HZ = 30
+    # full instance-attribute surface. Note that QObject still provides a
+    # __dict__, so subclasses can add their own attributes
+    __slots__ = ("args", "kwargs", "_abort", "_progress", "_emit_progress",
+                 "_last_progress_t", "_last_progress_v")
+
     progressSignal = QtCore.Signal(int)
     resultSignal = QtCore.Signal(object)
 
@@ -310,12 +411,15 @@ class ProfileWorker(QtCore.QObject):
         """
         """
         super().__init__()
-        # the thread has to have the same lifespan as the worker, otherwise
-        # they crash. To handle this, each worker has its own thread.
-        self.thread = QtCore.QThread()
         self.args = run_args
         self.kwargs = run_kwargs
         self._abort = False
+        self._last_progress_t = 0.0
+        self._last_progress_v = None
+        # set by run_worker: progress is only emitted if someone listens
+        self._emit_progress = True
+        # latest progress value, polled by the ProfileDialog
+        self._progress = None
 
     @QtCore.Slot()
     def abort(self):
@@ -327,17 +431,103 @@ class ProfileWorker(QtCore.QObject):
 
     def update_progress(self, val):
         """
-        Emits the given integer value via ``progressSignal``.
-        """
+        Stores the given integer value, to be polled by the ``ProfileDialog``,
+        and emits it via ``progressSignal``. Repeated values are skipped, and
+        emissions are throttled to ``MAX_PROGRESS_HZ``, but the final value of
+        the progress bar is always emitted, and so is the latest value once
+        ``run`` returns (see ``flush_progress``). Nothing is emitted if
+        ``_emit_progress`` is false (as set by ``run_worker``).
+        """
+        self._progress = val
+        if not self._emit_progress:
+            return
+        if val == self._last_progress_v:
+            return
+        now = time.monotonic()
+        if (val != ProfileDialog.PROGRESS_BAR_RANGE[1] and
+                (now - self._last_progress_t) < 1.0 / self.MAX_PROGRESS_HZ):
+            return
+        self._last_progress_t = now
+        self._last_progress_v = val
         self.progressSignal.emit(val)
 
+    def flush_progress(self):
+        """
+        Trailing edge of the ``update_progress`` throttling: emits the latest
+        stored progress value if it was held back.
+        """
+        val = self._progress
+        if (self._emit_progress and val is not None and
+                val != self._last_progress_v):
+            self._last_progress_t = time.monotonic()
+            self._last_progress_v = val
+            self.progressSignal.emit(val)
+
+    def run_context(self):
+        """
+        :returns: A context manager that ``wrapped_run`` enters around
+          ``run`` (by default, one that does nothing).
+
+        Override this to set up any state needed by the job on the worker
+        thread. Note that the GUI thread can only run while the worker
+        releases the GIL: NumPy/PyTorch calls do that for their heavy native
+        parts, so pure-Python loops in ``run`` should be kept light, delegating
+        heavy work to vectorized/native calls. For PyTorch inference, e.g.
+        returning ``torch.inference_mode()`` here also skips all the autograd
+        bookkeeping.
+        """
+        return contextlib.nullcontext()
+
     def wrapped_run(self):
         """
         Result of run is always emitted via resultSignal.
         """
-        result = self.run(*self.args, **self.kwargs)
+        with self.run_context():
+            if self.USE_MULTIPROCESSING:
+                result = self._run_in_process()
+            else:
+                result = self.run(*self.args, **self.kwargs)
+        self.flush_progress()
         self.resultSignal.emit(result)
 
+    def _run_in_process(self):
+        """
+        Runs the (static) ``run`` on a new process and blocks this thread
+        until it is done, forwarding its progress. If the job is aborted, the
+        process is terminated and ``None`` is returned.
+
+        Processes are spawned rather than forked, since forking this
+        multithreaded (Qt, PyTorch) process is unsafe.
+        """
+        ctx = multiprocessing.get_context("spawn")
+        recv_conn, send_conn = ctx.Pipe(duplex=False)
+        proc = ctx.Process(
+            target=_process_entry, daemon=True,
+            args=(send_conn, type(self).run, self.args, self.kwargs))
+        proc.start()
+        # close our copy of the sending end, so recv fails if the child dies
+        send_conn.close()
+        try:
+            while True:
+                if self._abort:
+                    proc.terminate()
+                    return None
+                if not recv_conn.poll(self.ABORT_POLL_SECS):
+                    continue
+                try:
+                    kind, payload = recv_conn.recv()
+                except EOFError:
+                    raise RuntimeError("Worker process exited unexpectedly")
+                if kind == "progress":
+                    self.update_progress(payload)
+                elif kind == "error":
+                    raise RuntimeError("Worker process failed:\n" + payload)
+                else:
+                    return payload
+        finally:
+            proc.join()
+            recv_conn.close()
+
     def run(self, *args, **kwargs):
         """
         Parameterless method that returns the result of computation.
@@ -346,6 +536,25 @@ class ProfileWorker(QtCore.QObject):
             "Check ExampleProfile for an implementation example")
 
 
+class ProfileRunnable(QtCore.QRunnable):
+    """
+    Adapter to run a ``ProfileWorker`` on a ``QThreadPool``. The worker
+    itself remains a ``QObject`` (a ``QRunnable`` can't emit signals), and
+    since it lives in the GUI thread, its signals are delivered there queued.
+    """
+
+    def __init__(self, worker):
+        """
+        """
+        super().__init__()
+        self.worker = worker
+
+    def run(self):
+        """
+        """
+        self.worker.wrapped_run()
+
+
 # #############################################################################
 # ## DIALOG
 # #############################################################################
@@ -374,6 +583,7 @@ class ProfileDialog(FlexibleDialog):
     REJECT_BUTTON_TXT = "CANCEL"
     WAITING_TXT = "Processing..."
     PROGRESS_BAR_RANGE = (0, 100)
+    PROGRESS_POLL_MS = 33
 
     abortWorkerSignal = QtCore.Signal()
 
@@ -388,25 +598,37 @@ class ProfileDialog(FlexibleDialog):
           Otherwise it will click reject.
         """
         self.with_progress_bar = with_progress_bar
+        self._pb_min, self._pb_max = self.PROGRESS_BAR_RANGE
         self.profile = profile
         self.body_text = body_text
         self.title_style = title_style
         self.default_accept_button = default_accept_button
         super().__init__(reject_button_name=self.REJECT_BUTTON_TXT,
                          parent=profile)
+        # the progress of the profile's current worker is polled periodically
+        self.progress_timer = QtCore.QTimer(self)
+        self.progress_timer.setInterval(self.PROGRESS_POLL_MS)
+        self.progress_timer.timeout.connect(self.poll_progress)
+        self.finished.connect(self.progress_timer.stop)
+        if self.with_progress_bar:
+            self.progress_timer.start()
 
     @staticmethod
     def get_params_table(params_dict):
         """
         """
-        params_table = QtWidgets.QTableWidget()
-        params_table.setRowCount(len(params_dict) + 1)
-        params_table.setColumnCount(2)
-        params_table.setItem(0, 0, QtWidgets.QTableWidgetItem("PARAMETER"))
-        params_table.setItem(0, 1, QtWidgets.QTableWidgetItem("VALUE"))
-        for i, (k, v) in enumerate(params_dict.items(), 1):
+        params_table = QtWidgets.QTableWidget(len(params_dict), 2)
+        params_table.setHorizontalHeaderLabels(["PARAMETER", "VALUE"])
+        # populate all cells at once, without intermediate updates
+        params_table.setUpdatesEnabled(False)
+        params_table.setSortingEnabled(False)
+        params_table.blockSignals(True)
+        for i, (k, v) in enumerate(params_dict.items()):
             params_table.setItem(i, 0, QtWidgets.QTableWidgetItem(str(k)))
             params_table.setItem(i, 1, QtWidgets.QTableWidgetItem(str(v)))
+        params_table.blockSignals(False)
+        params_table.setUpdatesEnabled(True)
+        params_table.viewport().update()
         return params_table
 
     def get_title_label(self, txt):
@@ -436,7 +658,7 @@ class ProfileDialog(FlexibleDialog):
         #
         self.header_lbl = self.get_title_label(
             self.HEADER_TXT.format(self.profile.NAME))
-        self.line1 = get_separator_line(horizontal=True)
+        self.line1 = None  # only created if there are parameters
         self.body = QtWidgets.QLabel(self.body_text)
         self.line2 = get_separator_line(horizontal=True)
         self.waiting_layout = self.get_waiting_layout()
@@ -452,9 +674,9 @@ class ProfileDialog(FlexibleDialog):
         # Create/add table with parameters only if form had parameters
         form_state = self.profile.form.get_state()
         if form_state:
+            self.line1 = get_separator_line(horizontal=True)
             main_layout.addWidget(self.line1)
-            self.params_table = self.get_params_table(
-                self.profile.form.get_state())
+            self.params_table = self.get_params_table(form_state)
             main_layout.addWidget(self.params_table)
         #
         main_layout.addWidget(self.line2)
@@ -467,16 +689,26 @@ class ProfileDialog(FlexibleDialog):
         Call this with an int to update progress bar.
         """
         if self.with_progress_bar:
-            minval, maxval = self.PROGRESS_BAR_RANGE
-            assert minval <= step <= maxval, \
-                f"{step} not in progress bar range {(minval, maxval)}!"
+            assert self._pb_min <= step <= self._pb_max, \
+                f"{step} not in progress bar range {self.PROGRESS_BAR_RANGE}!"
             self.waiting_widget.setValue(step)
 
+    @QtCore.Slot()
+    def poll_progress(self):
+        """
+        Reads the latest progress from the profile's current worker, if any,
+        and updates the progress bar with it.
+        """
+        worker = self.profile._current_worker
+        if worker is not None and worker._progress is not None:
+            self.update_progress(worker._progress)
+
     @QtCore.Slot(object)
     def on_finished_worker(self, result):
         """
         Show results and await for user confirmation/cancel.
         """
+        self.progress_timer.stop()
         # create and add title to result layout
         title = self.get_title_label(self.RESULT_HEADER_TXT)
         self.result_layout.addWidget(title)
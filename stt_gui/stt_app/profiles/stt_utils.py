@@ -8,9 +8,60 @@ plugins (profiles) for this application.
 """
 
 
+import logging
+from functools import lru_cache
+#
+import numpy as np
 import torch
 import torchaudio
 import Levenshtein
+# rapidfuzz's Indel similarity equals Levenshtein.ratio, but is computed
+# bit-parallel, which is much faster. Use it if available. Recent versions
+# also provide cpdist, which scores many pairs at once in parallel C++
+try:
+    from rapidfuzz.distance import Indel
+    string_similarity = Indel.normalized_similarity
+    try:
+        from rapidfuzz.process import cpdist
+    except ImportError:
+        cpdist = None
+except ImportError:
+    string_similarity = Levenshtein.ratio
+    cpdist = None
+# per-window progress is logged at debug level, so it costs nothing unless
+# explicitly enabled
+LOGGER = logging.getLogger(__name__)
+# soxr is a much faster CPU resampler than torchaudio. Use it if available
+try:
+    import soxr
+except ImportError:
+    soxr = None
+
+
+# ##############################################################################
+# # RESAMPLING
+# ##############################################################################
+@lru_cache(maxsize=8)
+def get_resampler(orig_sr, target_sr):
+    """
+    :returns: A ``torchaudio.transforms.Resample`` for the given rates. It is
+      cached, so its filter kernel is only computed once per rate pair.
+    """
+    return torchaudio.transforms.Resample(orig_freq=orig_sr,
+                                          new_freq=target_sr)
+
+
+def resample(wav, orig_sr, target_sr):
+    """
+    :param wav: Float CPU tensor of shape ``(channels, num_samples)``.
+    :returns: The resampled tensor, of shape ``(channels, new_num_samples)``.
+
+    Uses ``soxr`` if installed, and a cached torchaudio resampler otherwise.
+    """
+    if soxr is not None:
+        arr = soxr.resample(wav.numpy().T, orig_sr, target_sr, quality="HQ")
+        return torch.from_numpy(np.ascontiguousarray(arr.T))
+    return get_resampler(orig_sr, target_sr)(wav)
 
 
 # ##############################################################################
@@ -28,15 +79,12 @@ def read_audio(path: str,
     if wav.size(0) > 1:
         wav = wav.mean(dim=0, keepdim=True)
     if (target_sr is not None) and (sr != target_sr):
-        transform = torchaudio.transforms.Resample(
-            orig_freq=sr, new_freq=target_sr)
-        wav = transform(wav)
+        wav = resample(wav, sr, target_sr)
         sr = target_sr
         assert sr == target_sr
     result = wav.squeeze(0)
     if normalize:
-        result -= result.mean()
-        result /= abs(result).max()
+        normalize_(result)
     return result, sr
 
 
@@ -46,7 +94,7 @@ def read_audio(path: str,
 def merge_overlapping_strings(str1, str2, thresh=1.0, max_range=None):
     """
     :param thresh: Levenshtein similarity threshold, between 0 (none) and
-      1 (identical).
+      1 (identical). Computed via ``string_similarity``.
 
     :returns: ``(merged_str, match_size, match_score)``
 
@@ -61,14 +109,34 @@ def merge_overlapping_strings(str1, str2, thresh=1.0, max_range=None):
     """
     match = 0
     match_score = -1
+    # nothing to overlap with
+    if not str1 or not str2:
+        return str1 + str2, match, match_score
     if max_range is None:
         max_range = min(len(str1), len(str2))
-    #
-    for i in range(max_range):
-        score = Levenshtein.ratio(str1[-i:], str2[:i])
-        if score >= thresh:
-            match = i
-            match_score = score
+    # we want the longest (suffix, prefix) overlap that reaches the threshold.
+    # If the longest candidate is an exact match, there is no need to search
+    top = max_range - 1
+    if top > 0 and thresh <= 1 and str1[-top:] == str2[:top]:
+        return str1 + str2[top:], top, 1.0
+    if cpdist is not None:
+        # score all candidates at once, in parallel
+        suffixes = [str1[-i:] for i in range(max_range)]
+        prefixes = [str2[:i] for i in range(max_range)]
+        scores = cpdist(suffixes, prefixes, scorer=string_similarity,
+                        workers=-1)
+        above_thresh = np.flatnonzero(scores >= thresh)
+        if len(above_thresh) > 0:
+            match = int(above_thresh[-1])
+            match_score = float(scores[match])
+    else:
+        # search from the longest candidate down, stopping at the first hit
+        for i in range(max_range - 1, -1, -1):
+            score = string_similarity(str1[-i:], str2[:i])
+            if score >= thresh:
+                match = i
+                match_score = score
+                break
     # interpolate the biggest match and put blocks together
     result = str1 + str2[match:]
     # both median and quickmedian are unfortunately very slow
@@ -81,6 +149,35 @@ def merge_overlapping_strings(str1, str2, thresh=1.0, max_range=None):
 # ##############################################################################
 # # AUDIO SIGNAL PROCESSING
 # ##############################################################################
+def normalize_(tnsr, scale=1.0):
+    """
+    Subtracts the mean of the given tensor, and scales it so that its maximal
+    absolute value equals ``scale``. The peak is obtained from the max and
+    min, so no intermediate ``abs`` tensor is needed, and the scaling is
+    fused into a single multiplication.
+
+    .. warning::
+      Operation is performed in-place! It modifies (and returns) the input.
+    """
+    mean = tnsr.mean()
+    peak = torch.max(tnsr.max() - mean, mean - tnsr.min())
+    tnsr.sub_(mean)
+    if peak > 0:
+        tnsr.mul_(scale / peak)
+    return tnsr
+
+
+@lru_cache(maxsize=16)
+def get_ramp(n, device, dtype, descending=False):
+    """
+    :returns: A ``linspace(0, 1, n)`` tensor (or ``linspace(1, 0, n)`` if
+      descending) on the given device and dtype. It is cached, since fades
+      usually have the same length, so it must not be modified.
+    """
+    beg, end = (1, 0) if descending else (0, 1)
+    return torch.linspace(beg, end, n, device=device, dtype=dtype)
+
+
 def linear_fade(tnsr, fade_in=0, fade_out=0):
     """
     Given a 1-D tensor, apply a linear fade in/out ratio from
@@ -94,12 +191,12 @@ def linear_fade(tnsr, fade_in=0, fade_out=0):
     .. warning::
       Operation is performed in-place! It modifies the input.
     """
-    device = tnsr.device
     if fade_in > 0:
-        ramp_in = torch.linspace(0, 1, fade_in + 2).to(device)
+        ramp_in = get_ramp(fade_in + 2, tnsr.device, tnsr.dtype)
         tnsr[:fade_in + 1] *= ramp_in[1:]
     if fade_out > 0:
-        ramp_out = torch.linspace(1, 0, fade_out + 2).to(device)
+        ramp_out = get_ramp(fade_out + 2, tnsr.device, tnsr.dtype,
+                            descending=True)
         tnsr[-fade_out - 1:] *= ramp_out[:-1]
 
 
@@ -107,7 +204,9 @@ def linear_fade(tnsr, fade_in=0, fade_out=0):
 # # WINDOWED INFERENCE
 # ##############################################################################
 def windowed_run(model, tnsr, max_winsize=160_000, overlap_ratio=0.1,
-                 device="cpu", chunk_hook=lambda ch: ch.to("cpu")):
+                 device="cpu",
+                 chunk_hook=lambda out, row: out[row:row + 1].to("cpu"),
+                 progress_cb=None, abort_cb=None, batch_size=1):
     """
     :param model: A model with signature``results = model(tensor)``
       for a float batch tensor of shape ``(b, n)``.
@@ -117,10 +216,19 @@ def windowed_run(model, tnsr, max_winsize=160_000, overlap_ratio=0.1,
       overlap, 1 full ovelap.
     :param device: The input to the model (and therefore the computations)
       will be on this device. But the outputs will be sent back to CPU to
-      avoid potential GPU overflow.
-    :param chunk_hook: Before appending the model output to ``chunks``, it
-      is passed through this function.
-    :returns: Windowed results, window startpoints, window size.
+      avoid potential GPU overflow. If it is a CUDA device and ``tnsr`` is on
+      CPU, windows are assembled in pinned memory and copied asynchronously.
+    :param chunk_hook: A function ``chunk_hook(output, row)`` that, given
+      the model output for a batch of windows and a row index, returns the
+      result for that window, to be appended to ``chunks``.
+    :param progress_cb: If given, it is called with the progress percentage
+      (an integer between 0 and 100) before each model call.
+    :param abort_cb: If given, it is called before each model call. If it
+      returns true, the run is aborted and ``None`` is returned.
+    :param batch_size: Up to this many windows are stacked into the batch
+      for each model call.
+    :returns: Windowed results (one per window), window startpoints, window
+      size.
 
     This function calls the given model on the given tensor. If the tensor
     is longer than max_winsize, calls the model multiple times for the
@@ -132,17 +240,45 @@ def windowed_run(model, tnsr, max_winsize=160_000, overlap_ratio=0.1,
     stride = winsize - overlap
     #
     chunks = []
-    batch = torch.zeros_like(tnsr[:winsize]).unsqueeze(0).to(device)
     window_range = list(range(0, n, stride))
     num_windows = len(window_range)
-    for i, beg in enumerate(window_range, 1):
-        print(f"windowed_run: processing [{i}/{num_windows}]")
-        end = beg + winsize
-        chunk = tnsr[beg:end]
-        batch *= 0
-        batch[:, :len(chunk)] = chunk
-        output = chunk_hook(model(batch))
-        chunks.append(output)
+    batch_size = max(1, min(batch_size, num_windows))
+    device = torch.device(device)
+    staged = (device.type == "cuda") and (tnsr.device.type == "cpu")
+    # windows are assembled in a host buffer (pinned if it is copied to the
+    # GPU, so the transfer can be asynchronous) and then moved to batch
+    stage = torch.zeros((batch_size, winsize), dtype=tnsr.dtype,
+                        device=None if staged else device, pin_memory=staged)
+    batch = (torch.empty((batch_size, winsize), dtype=tnsr.dtype,
+                         device=device) if staged else stage)
+    copied = None
+    # stage rows are only zeroed where the previous window was longer
+    stage_filled = [0] * batch_size
+    for i in range(0, num_windows, batch_size):
+        if abort_cb is not None and abort_cb():
+            return
+        batch_begs = window_range[i:i + batch_size]
+        rows = len(batch_begs)
+        if progress_cb is not None:
+            progress_cb(int((i + rows) / num_windows * 100))
+        LOGGER.debug("windowed_run: processing [%d/%d]", i + rows,
+                     num_windows)
+        if copied is not None:
+            # don't overwrite the stage while its last copy is in flight
+            copied.synchronize()
+        for row, beg in enumerate(batch_begs):
+            chunk = tnsr[beg:beg + winsize]
+            chunklen = len(chunk)
+            stage[row, :chunklen].copy_(chunk)
+            if chunklen < stage_filled[row]:
+                stage[row, chunklen:stage_filled[row]].zero_()
+            stage_filled[row] = chunklen
+        if staged:
+            batch[:rows].copy_(stage[:rows], non_blocking=True)
+            copied = torch.cuda.Event()
+            copied.record()
+        output = model(batch[:rows])
+        chunks.extend(chunk_hook(output, row) for row in range(rows))
     return chunks, window_range, winsize, overlap
 
 
@@ -163,19 +299,24 @@ def windowed_audio_rendering(model, tnsr, max_winsize=160_000,
     """
     chunks, begs, winsize, overlap = windowed_run(model, tnsr, max_winsize,
                                                   overlap_ratio, device)
-    # first chunk doesn't have fade-in
-    for ch in chunks[1:]:
-        linear_fade(ch[0], fade_in=overlap)
-    # last chunk doesn't have fade-out
-    for ch in chunks[:-1]:
-        linear_fade(ch[0], fade_out=overlap)
-    #
-    result = torch.zeros_like(tnsr, device=tnsr.device)
-    len_result = len(result)
-    for beg, ch in zip(begs, chunks):
-        end = min(beg + winsize, len_result)
-        chunksize = end - beg
-        result[beg:end] += ch[0][:chunksize].to(result.device)
+    # shape (num_chunks, winsize)
+    stacked = torch.cat(chunks, dim=0)[:, :winsize]
+    num_chunks = len(stacked)
+    # apply the cross-fades to all chunks at once (same as linear_fade): the
+    # first chunk doesn't have fade-in, and the last one doesn't have fade-out
+    if overlap > 0 and num_chunks > 1:
+        ramp_in = get_ramp(overlap + 2, stacked.device, stacked.dtype)
+        ramp_out = get_ramp(overlap + 2, stacked.device, stacked.dtype,
+                            descending=True)
+        stacked[1:, :overlap + 1] *= ramp_in[1:]
+        stacked[:-1, -overlap - 1:] *= ramp_out[:-1]
+    # overlap-add all chunks in a single fold operation
+    stride = winsize - overlap
+    full_len = (num_chunks - 1) * stride + winsize
+    result = torch.nn.functional.fold(
+        stacked.T.unsqueeze(0), output_size=(1, full_len),
+        kernel_size=(1, winsize), stride=(1, stride)).view(-1)
+    result = result[:len(tnsr)].to(device=tnsr.device, dtype=tnsr.dtype)
     #
     return result, begs, winsize, overlap
 
@@ -183,26 +324,49 @@ def windowed_audio_rendering(model, tnsr, max_winsize=160_000,
 def windowed_stt_rendering(model, tnsr, max_winsize=160_000,
                            overlap_ratio=0.1, device="cpu",
                            overlap_merge_threshold=0.8,
-                           max_overlap_characters=1000):
+                           max_overlap_characters=1000,
+                           progress_cb=None, abort_cb=None, batch_size=1):
     """
     Performs a ``windowed_run`` of the ``model`` on the given ``tnsr``,
     and then calls ``merge_overlapping_strings`` to stitch the windowed
     STT results, using the Levenshtein similarity metric.
+    :param progress_cb: See ``windowed_run``. It is also called during
+      merging, reporting its progress again from 0 to 100.
+    :param abort_cb: See ``windowed_run``. Also checked during merging.
+    :param batch_size: See ``windowed_run``.
     :returns: The pair ``(merged_string, match_scores)``, where the scores
-      are the Levenshtein similarities.
+      are the Levenshtein similarities, or ``None`` if aborted.
     """
-    chunks, begs, winsize, overlap = windowed_run(
+    run_outcome = windowed_run(
         model, tnsr, max_winsize, overlap_ratio, device,
-        chunk_hook=lambda ch: ch[0][0])
+        chunk_hook=lambda out, row: out[0][row],
+        progress_cb=progress_cb, abort_cb=abort_cb, batch_size=batch_size)
+    if run_outcome is None:
+        return
+    chunks, begs, winsize, overlap = run_outcome
     num_chunks = len(chunks)
     #
-    merged = ""
+    # The merged text is kept as a list of parts. Since the overlap search
+    # only looks at the last max_overlap_characters of the merged text, only
+    # that tail is passed, so each merge costs the same regardless of the
+    # total length
+    parts = []
+    tail = ""
     match_scores = []
     for i, ch in enumerate(chunks, 1):
-        print(f"Merging texts: [{i}/{num_chunks}]")
+        if abort_cb is not None and abort_cb():
+            return
+        if progress_cb is not None:
+            progress_cb(int(i / num_chunks * 100))
+        LOGGER.debug("Merging texts: [%d/%d]", i, num_chunks)
         # merged, match_len, match_score, interp
-        merged, _, match_score = merge_overlapping_strings(
-            merged, ch, overlap_merge_threshold, max_overlap_characters)
+        _, match, match_score = merge_overlapping_strings(
+            tail, ch, overlap_merge_threshold, max_overlap_characters)
+        new_part = ch[match:]
+        parts.append(new_part)
+        tail += new_part
+        if max_overlap_characters is not None:
+            tail = tail[-max_overlap_characters:]
         match_scores.append(match_score)
     #
-    return merged, match_scores
+    return "".join(parts), match_scores
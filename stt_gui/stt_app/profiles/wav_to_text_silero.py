@@ -6,23 +6,39 @@
 """
 
 
+import os
+import logging
+#
 import numpy as np
 #
 import torch
-import torchaudio
 #
 from PySide2 import QtWidgets, QtCore
 #
 from ...widgets import WidgetWithValueState, DecimalSpinBox, BoolCheckBox
+from ...widgets import IntSpinBox
 from ...dialogs import InfoDialog
 from . import Profile, ProfileDialog, ProfileWorker
-from .stt_utils import merge_overlapping_strings
+from .stt_utils import windowed_stt_rendering, resample, normalize_
 
 
 # #############################################################################
 # ## GLOBALS
 # #############################################################################
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+LOGGER = logging.getLogger(__name__)
+
+
+def autocast_fp16(enabled):
+    """
+    :returns: A CUDA float16 autocast context. ``torch.autocast`` is used if
+      available (PyTorch 1.10+), since ``torch.cuda.amp.autocast`` is
+      deprecated in recent versions.
+    """
+    if hasattr(torch, "autocast"):
+        return torch.autocast(device_type="cuda", dtype=torch.float16,
+                              enabled=enabled)
+    return torch.cuda.amp.autocast(enabled=enabled)
 
 
 # #############################################################################
@@ -64,6 +80,15 @@ class WindowOverlapRatioSpinBox(DecimalSpinBox, WidgetWithValueState):
                          default=default, step=0.001)
 
 
+class BatchSizeSpinBox(IntSpinBox, WidgetWithValueState):
+    """
+    """
+    def __init__(self, parent, default):
+        """
+        """
+        super().__init__(parent, minimum=1, maximum=64, default=default)
+
+
 class AmplitudeRatioSpinBox(DecimalSpinBox, WidgetWithValueState):
     """
     """
@@ -107,13 +132,105 @@ class SileroSTT:
     """
     TORCH_HUB_REPO = "snakers4/silero-models"
     EXPECTED_SRATE = 16000
+    # loaded (encoder, decoder) pairs, so models are only loaded once per
+    # session
+    _cache = {}
+    # Using all cores for intra-op parallelism tends to thrash caches on
+    # audio windows, so half of them are used when running on CPU
+    CPU_NUM_THREADS = max(1, (os.cpu_count() or 2) // 2)
+    # on CPU, eager encoders are dynamically quantized to int8
+    QUANTIZE_CPU = True
+
+    def __init__(self, model="silero_stt", language="en", device="cpu",
+                 optimize=True):
+        """
+        :param optimize: If true, the encoder is optimized for repeated
+          inference calls (see ``optimize_encoder``).
+        """
+        key = (model, language, device, optimize)
+        if key not in self._cache:
+            if device == "cpu":
+                self.configure_cpu_threads()
+            encoder, decoder, utils = torch.hub.load(
+                repo_or_dir=self.TORCH_HUB_REPO, model=model,
+                language=language, device=device)
+            if device == "cpu" and self.QUANTIZE_CPU:
+                encoder = self.quantize_encoder(encoder)
+            if optimize:
+                encoder = self.optimize_encoder(encoder, device)
+            self._cache[key] = (encoder, decoder)
+        self.encoder, self.decoder = self._cache[key]
+
+    @classmethod
+    def configure_cpu_threads(cls):
+        """
+        Sets the number of PyTorch threads to ``CPU_NUM_THREADS`` for
+        intra-op parallelism, and to 1 for inter-op parallelism. The latter
+        can only be set before any parallel work has started, otherwise it
+        is left untouched.
+        """
+        torch.set_num_threads(cls.CPU_NUM_THREADS)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass
+
+    @staticmethod
+    def quantize_encoder(encoder):
+        """
+        :returns: A version of the given encoder with int8 dynamically
+          quantized linear and LSTM layers, or the encoder itself if it can't
+          be quantized.
 
-    def __init__(self, model="silero_stt", language="en", device="cpu"):
+        Dynamic quantization only works on eager modules, so TorchScript
+        modules (like the ones currently distributed by Silero) are returned
+        unchanged.
         """
+        if isinstance(encoder, torch.jit.ScriptModule):
+            return encoder
+        return torch.quantization.quantize_dynamic(
+            encoder, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8)
+
+    @classmethod
+    def optimize_encoder(cls, encoder, device="cpu"):
+        """
+        :returns: An optimized version of the given encoder, or the encoder
+          itself if no optimization is available or it fails.
+
+        Silero models are distributed as TorchScript modules, which can be
+        frozen and fused via ``torch.jit.optimize_for_inference``. Eager
+        modules are compiled via ``torch.compile`` if available (PyTorch 2+).
+        Since some failures only show up when the optimized encoder is run,
+        it is called once on a second of silence before being accepted.
+        """
+        is_script = isinstance(encoder, torch.jit.ScriptModule)
+        if is_script:
+            optimize_fn = getattr(torch.jit, "optimize_for_inference", None)
+        else:
+            optimize_fn = getattr(torch, "compile", None)
+        if optimize_fn is None:
+            return encoder
+        try:
+            if is_script:
+                optimized = optimize_fn(encoder.eval())
+            else:
+                optimized = optimize_fn(encoder, mode="reduce-overhead")
+            warmup = torch.zeros((1, cls.EXPECTED_SRATE), device=device)
+            cls.run_encoder(optimized, warmup)
+            return optimized
+        except Exception:
+            LOGGER.warning("Encoder optimization failed, using unoptimized "
+                           "encoder", exc_info=True)
+            return encoder
+
+    @staticmethod
+    def run_encoder(encoder, batch):
         """
-        self.encoder, self.decoder, utils = torch.hub.load(
-            repo_or_dir=self.TORCH_HUB_REPO, model=model,
-            language=language, device=device)
+        :returns: The encoder output for the given batch, computed without
+          autograd and, on CUDA, in mixed precision.
+        """
+        with torch.inference_mode(), autocast_fp16(batch.is_cuda):
+            return encoder(batch)
 
     def __call__(self, batch):
         """
@@ -122,8 +239,11 @@ class SileroSTT:
 
         It is possibly beneficial if the audios have zero mean and 0.182 std.
         """
-        embeddings = self.encoder(batch)
-        texts = [self.decoder(c.to("cpu")) for c in embeddings]
+        embeddings = self.run_encoder(self.encoder, batch)
+        # a single device-to-host transfer for the whole batch (the decoder
+        # expects float32)
+        embeddings_cpu = embeddings.detach().to("cpu", dtype=torch.float32)
+        texts = [self.decoder(c) for c in embeddings_cpu]
         return texts, embeddings
 
 
@@ -133,109 +253,86 @@ class WavToTextSileroWorker(ProfileWorker):
 
     OVERLAP_MERGE_THRESHOLD = 0.9
     MAX_OVERLAP_CHARS = 1000
+    # growable CUDA memory segments avoid fragmentation across windows
+    CUDA_ALLOCATOR_SETTINGS = "expandable_segments:True"
 
-    def windowed_run(self, model, tnsr, max_winsize=160_000, overlap_ratio=0.1,
-                     device="cpu", chunk_hook=lambda ch: ch.to("cpu")):
-        """
-        :param model: A model with signature``results = model(tensor)``
-          for a float batch tensor of shape ``(b, n)``.
-        :param tnsr: A 1-D tensor with float audio. Expected to be in adequate
-          normalization and frequency for the given model.
-        :param overlap_ratio: Overlap between consecutive windows. 0 means no
-          overlap, 1 full ovelap.
-        :param device: The input to the model (and therefore the computations)
-          will be on this device. But the outputs will be sent back to CPU to
-          avoid potential GPU overflow.
-        :param chunk_hook: Before appending the model output to ``chunks``, it
-          is passed through this function.
-        :returns: Windowed results, window startpoints, window size.
-
-        This function calls the given model on the given tensor. If the tensor
-        is longer than max_winsize, calls the model multiple times for the
-        resulting (potentially overlapping) chunks.
-        """
-        n = len(tnsr)
-        winsize = min(max_winsize, n)
-        overlap = int(overlap_ratio * winsize)
-        stride = winsize - overlap
-        #
-        chunks = []
-        batch = torch.zeros_like(tnsr[:winsize]).unsqueeze(0).to(device)
-        window_range = list(range(0, n, stride))
-        num_windows = len(window_range)
-        for i, beg in enumerate(window_range, 1):
-            if self._abort:
-                return
-            self.update_progress(int(i / num_windows * 100))
-            print(f"windowed_run: processing [{i}/{num_windows}]")
-            end = beg + winsize
-            chunk = tnsr[beg:end]
-            batch *= 0
-            batch[:, :len(chunk)] = chunk
-            output = chunk_hook(model(batch))
-            chunks.append(output)
-        return chunks, window_range, winsize, overlap
-
-    def windowed_stt_rendering(self, model, tnsr, max_winsize=160_000,
-                               overlap_ratio=0.1, device="cpu",
-                               overlap_merge_threshold=0.8,
-                               max_overlap_characters=1000):
-        """
-        """
-        chunks, begs, winsize, overlap = self.windowed_run(
-            model, tnsr, max_winsize, overlap_ratio, device,
-            chunk_hook=lambda ch: ch[0][0])
-        num_chunks = len(chunks)
-        #
-        merged = ""
-        match_scores = []
-        for i, ch in enumerate(chunks, 1):
-            if self._abort:
-                return
-            self.update_progress(int(i / num_chunks * 100))
-            print(f"Merging texts: [{i}/{num_chunks}]")
-            # merged, match_len, match_score, interp
-            merged, _, match_score = merge_overlapping_strings(
-                merged, ch, overlap_merge_threshold, max_overlap_characters)
-            match_scores.append(match_score)
-        #
-        return merged, match_scores
+    def run_context(self):
+        """
+        The whole job is inference, so autograd tracking is disabled.
+        """
+        return torch.inference_mode()
 
-    def prepare_arr(self, arr, arr_sr, target_sr, normalize=True):
+    def prepare_arr(self, arr, arr_sr, target_sr, normalize=True,
+                    amp_ratio=1.0):
         """
         :param arr: Numpy audio array.
         Code modified from https://github.com/snakers4/silero-models
         :param normalize: If given, subtract mean and set max abs value to 1
+        :param amp_ratio: The result is multiplied by this (fused with the
+          normalization, if given).
         """
-        wav = torch.from_numpy(arr.astype(np.float32))
-        if len(wav.shape) == 1:
-            wav.unsqueeze_(0)
-        if wav.size(0) > 1:
-            wav = wav.mean(dim=0, keepdim=True)
+        # channel mean and float32 cast are done in numpy, directly into a
+        # single new array (or none, if arr is already mono float32)
+        if arr.ndim == 2 and arr.shape[0] > 1:
+            arr32 = arr.mean(axis=0, dtype=np.float32)
+        else:
+            arr32 = arr.astype(np.float32, copy=False)
+        wav = torch.from_numpy(arr32).reshape(1, -1)
+        # if no new array was created, the in-place operations below must not
+        # modify the given arr
+        shares_input = arr32 is arr
         if (target_sr is not None) and (arr_sr != target_sr):
-            transform = torchaudio.transforms.Resample(
-                orig_freq=arr_sr, new_freq=target_sr)
-            wav = transform(wav)
+            wav = resample(wav, arr_sr, target_sr)
+            shares_input = False
         result = wav.squeeze(0)
+        if shares_input and (normalize or amp_ratio != 1):
+            result = result.clone()
         if normalize:
-            result -= result.mean()
-            result /= abs(result).max()
+            normalize_(result, amp_ratio)
+        elif amp_ratio != 1:
+            result.mul_(amp_ratio)
         return result
 
+    def configure_cuda_allocator(self):
+        """
+        Applies ``CUDA_ALLOCATOR_SETTINGS`` to the PyTorch CUDA allocator.
+        This is only possible with recent PyTorch versions, otherwise the
+        allocator is left untouched.
+        """
+        set_settings = getattr(torch.cuda.memory, "_set_allocator_settings",
+                               None)
+        if set_settings is not None:
+            try:
+                set_settings(self.CUDA_ALLOCATOR_SETTINGS)
+            except RuntimeError:
+                LOGGER.warning("Could not configure CUDA allocator, ignoring",
+                               exc_info=True)
+
     def run(self, wav_arr, wav_arr_srate, max_win_secs, win_overlap_ratio,
-            amp_ratio, device):
+            amp_ratio, device, batch_size=1, optimize=True):
         """
+        :param batch_size: Windows per model call. Device memory grows
+          linearly with it (times ``max_win_secs``).
+        :param optimize: Whether to optimize the STT encoder (see
+          ``SileroSTT.optimize_encoder``).
         """
-        stt_model = SileroSTT("silero_stt", "en", device)
+        if device == "cuda":
+            self.configure_cuda_allocator()
+        stt_model = SileroSTT("silero_stt", "en", device, optimize)
         # load whole audio on CPU, shape=n
-        whole_audio = self.prepare_arr(wav_arr, wav_arr_srate,
-                                       stt_model.EXPECTED_SRATE, normalize=True)
-        whole_audio *= amp_ratio
+        whole_audio = self.prepare_arr(
+            wav_arr, wav_arr_srate, stt_model.EXPECTED_SRATE, normalize=True,
+            amp_ratio=amp_ratio)
         #
         max_win_samples = int(max_win_secs * stt_model.EXPECTED_SRATE)
-        whole_text, _ = self.windowed_stt_rendering(
+        rendering = windowed_stt_rendering(
             stt_model, whole_audio, max_win_samples, win_overlap_ratio,
-            device, self.OVERLAP_MERGE_THRESHOLD, self.MAX_OVERLAP_CHARS)
+            device, self.OVERLAP_MERGE_THRESHOLD, self.MAX_OVERLAP_CHARS,
+            progress_cb=self.update_progress, abort_cb=lambda: self._abort,
+            batch_size=batch_size)
+        if rendering is None:  # aborted
+            return
+        whole_text, _ = rendering
         return whole_text
 
 
@@ -252,6 +349,8 @@ class WavToTextSileroProfile(Profile):
                  # ("Sample rate", SamplerateSpinBox, 16000),
                  ("Max window seconds", WindowSecondsSpinBox, 60),
                  ("Window overlap ratio", WindowOverlapRatioSpinBox, 0.05),
+                 ("Windows per batch", BatchSizeSpinBox, 1),
+                 ("Optimize model", BoolCheckBox, True),
                  ("Amplitude ratio", AmplitudeRatioSpinBox, 1),
                  ("Record-and-run mode", BoolCheckBox, False)]
 
@@ -269,6 +368,8 @@ class WavToTextSileroProfile(Profile):
         device = form_dict["Device"]
         max_win_secs = form_dict["Max window seconds"]
         win_overlap_ratio = form_dict["Window overlap ratio"]
+        batch_size = form_dict["Windows per batch"]
+        optimize = form_dict["Optimize model"]
         amp_ratio = form_dict["Amplitude ratio"]
         record_and_run = form_dict["Record-and-run mode"]
         #
@@ -296,7 +397,8 @@ class WavToTextSileroProfile(Profile):
         dialog = NewlinedProfileDialog(
             self, body_text="Running Silero model...", with_progress_bar=True)
         worker = WavToTextSileroWorker(
-            wav_arr, wav_sr, max_win_secs, win_overlap_ratio, amp_ratio, device)
+            wav_arr, wav_sr, max_win_secs, win_overlap_ratio, amp_ratio, device,
+            batch_size, optimize)
         self.run_worker(worker, dialog=dialog)
 
     def on_accept(self, result):
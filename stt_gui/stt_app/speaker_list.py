@@ -61,7 +61,7 @@ class SpeakerEntry(QtWidgets.QWidget):
         """
         """
         if rgb is None:
-            rgb = next(RandomColorGenerator().generate())
+            rgb = next(RandomColorGenerator.shared().generate())
         r, g, b = rgb
         self.color_tag.setStyleSheet(f"background-color: rgb({r}, {g}, {b});")
         self.rgb = rgb
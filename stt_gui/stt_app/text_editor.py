@@ -17,6 +17,24 @@ from ..commands import TextDocumentUndoWrapperCommand
 from ..dialogs import InfoDialog
 
 
+# #############################################################################
+# ## HELPERS
+# #############################################################################
+def compile_key_bitmap(keys):
+    """
+    :param keys: A collection of Qt keys, like ``DISABLE_CTRL_KEYS``.
+    :returns: A pair ``(bitmap, keyset)``, where ``keyset`` is a frozenset
+      with the keys as integers, and bit ``k & 63`` of the integer ``bitmap``
+      is set for every key ``k``. Testing the bit first rejects most keys
+      without hashing into the set.
+    """
+    keyset = frozenset(int(k) for k in keys)
+    bitmap = 0
+    for k in keyset:
+        bitmap |= 1 << (k & 63)
+    return bitmap, keyset
+
+
 # #############################################################################
 # ## TEXT EDITOR
 # #############################################################################
@@ -29,10 +47,12 @@ class TextEditor(QtWidgets.QPlainTextEdit):
     The first issue is that the parent class has several hardcoded built-in key
     events, and some of them may interfer with our app: if a key event is
     handled by the parent app, it won't get propagated anywhere else. To
-    prevent that, we add an ``eventFilter``, such that whenever any key event
-    fulfills the conditions in the ``catch_keyevent_condition`` method, that
-    event won't be handled by this text editor and will be sent out through
-    the ``eventCatched`` signal for further handling by the parent class.
+    prevent that, we override ``keyPressEvent``, such that whenever any key
+    event fulfills the conditions in the ``catch_keyevent_condition`` method,
+    that event won't be handled by this text editor and will be sent out
+    through the ``eventCatched`` signal for further handling by the parent
+    class. Overriding the handler (instead of installing an event filter on
+    the editor itself) means that non-key events never reach Python.
 
     Another issue is that ``QPlainTextEdit`` has a nice built-in undo stack,
     but unfortunately it cannot be accessed or integrated with other undo
@@ -42,6 +62,8 @@ class TextEditor(QtWidgets.QPlainTextEdit):
     2. Every time that this editor adds a Command to its own stack, it fires
        the ``undoCommandAdded(cmd)`` signal. Whenever that happens, we also
        add a ``TextDocumentUndoWrapperCommand(self)`` to the main stack.
+       Bursts of such signals (e.g. while pasting) are collapsed into a
+       single wrapper that undoes/redoes all of them at once.
     3. Then, every time the user sends an undo/redo event, it will go through
        the main undo stack only. But whenever the undo/redo action is a
        ``TextDocumentUndoWrapperCommand``, it will get passed to the editor
@@ -58,7 +80,12 @@ class TextEditor(QtWidgets.QPlainTextEdit):
 
     :cvar FILENAME_FILTER: Allowed file extensions for the open/save dialogs
 
-    :cvar eventCatched: The ``eventCatched(evt)`` signal (see explanation above)
+    :cvar INSERT_CHUNK_CHARS: Text files are read and inserted in chunks of
+      this many characters.
+
+    :cvar eventCatched: The ``eventCatched(key, modifiers, text)`` signal (see
+      explanation above). It carries the fields of the caught key event as
+      plain values, since the event itself is only valid during dispatch.
 
     :cvar DISABLE_CTRL_KEYS: When pressing ``Ctrl+<KEY>`` for any of the keys in
       this collection, the event will be disabled and sent via ``eventCatched``.
@@ -66,9 +93,29 @@ class TextEditor(QtWidgets.QPlainTextEdit):
     """
 
     FILENAME_FILTER = "Text files (*.txt *.TXT)"
+    INSERT_CHUNK_CHARS = 1 << 20
+    # line/paragraph separators and nbsp, as converted by toPlainText
+    _PLAIN_TEXT_TABLE = str.maketrans({"\u2028": "\n", "\u2029": "\n",
+                                       "\u00a0": " "})
     DISABLE_CTRL_KEYS = {QtCore.Qt.Key_Left,
                          QtCore.Qt.Key_Right}
-    eventCatched = QtCore.Signal(QtCore.QEvent)
+    eventCatched = QtCore.Signal(int, int, str)
+    # keypad and group switch flags are ignored when matching key events
+    _MODIFIERS_MASK = (int(QtCore.Qt.KeyboardModifierMask) &
+                       ~int(QtCore.Qt.KeypadModifier) &
+                       ~int(QtCore.Qt.GroupSwitchModifier))
+    _CATCH_COMBOS = None  # see get_catch_combos
+    _DISABLE_KEYS_BITMAP, _DISABLE_KEYS = compile_key_bitmap(
+        DISABLE_CTRL_KEYS)
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Subclasses may override ``DISABLE_CTRL_KEYS``, so the lookup
+        structures are recompiled for each of them.
+        """
+        super().__init_subclass__(**kwargs)
+        cls._DISABLE_KEYS_BITMAP, cls._DISABLE_KEYS = compile_key_bitmap(
+            cls.DISABLE_CTRL_KEYS)
 
     def __init__(self, parent=None, default_savedir=None, font_size=12,
                  external_undo_stack=None):
@@ -80,23 +127,63 @@ class TextEditor(QtWidgets.QPlainTextEdit):
         self.dirpath = (os.path.expanduser("~") if default_savedir is None
                         else default_savedir)
         self.quicksave_path = None  # last path saved. Quicksave will go here
-        # custom handle events and emit eventCatched signals
-        self.installEventFilter(self)
+        self._font_pts = None
         self.change_font_size(font_size)
         #
         if external_undo_stack is not None:
             self.external_undo_stack = external_undo_stack
+            # bursts of document commands get collapsed into a single push
+            self._pending_undo_count = 0
+            self._pending_undo_timer = QtCore.QTimer(
+                self, singleShot=True, interval=0)
+            self._pending_undo_timer.timeout.connect(self.flush_undo_added)
             self.document().undoCommandAdded.connect(self.handle_undo_added)
 
     # Handling undo stack integration
+    @QtCore.Slot()
     def handle_undo_added(self, *args, **kwargs):
         """
-        See class docstring.
+        See class docstring. Document commands are counted, and pushed to the
+        external stack as a single wrapper once control returns to the event
+        loop (see ``flush_undo_added``).
         """
-        cmd = TextDocumentUndoWrapperCommand(self)
+        self._pending_undo_count += 1
+        if not self._pending_undo_timer.isActive():
+            self._pending_undo_timer.start()
+
+    @QtCore.Slot()
+    def flush_undo_added(self):
+        """
+        Pushes a single ``TextDocumentUndoWrapperCommand`` covering all the
+        document commands added since the last flush, if any.
+        """
+        num_cmds = self._pending_undo_count
+        if num_cmds == 0:
+            return
+        self._pending_undo_count = 0
+        self._pending_undo_timer.stop()
+        cmd = TextDocumentUndoWrapperCommand(self, num_cmds)
         self.external_undo_stack.push(cmd)
 
     # Handling keyevent bypassing issue
+    @classmethod
+    def get_catch_combos(cls):
+        """
+        :returns: A frozenset with the ``key | modifiers`` integer combinations
+          for the platform's undo/redo bindings, plus ``Ctrl+Shift+Z``.
+
+        The set requires a running application (to query the platform
+        bindings), so it is computed upon first call and cached in the class.
+        """
+        if cls._CATCH_COMBOS is None:
+            seqs = (QtGui.QKeySequence.keyBindings(QtGui.QKeySequence.Undo) +
+                    QtGui.QKeySequence.keyBindings(QtGui.QKeySequence.Redo))
+            combos = {int(seq[0]) for seq in seqs if seq.count() == 1}
+            combos.add(int(QtCore.Qt.CTRL) | int(QtCore.Qt.SHIFT) |
+                       int(QtCore.Qt.Key_Z))
+            cls._CATCH_COMBOS = frozenset(combos)
+        return cls._CATCH_COMBOS
+
     @classmethod
     def catch_keyevent_condition(cls, keyevt):
         """
@@ -104,38 +191,32 @@ class TextEditor(QtWidgets.QPlainTextEdit):
         This method implements the conditions for the given key events
         that we want to filter out (see class docstring).
         """
-        modifiers = keyevt.modifiers()
-        ctrl = bool(modifiers & QtCore.Qt.ControlModifier)
-        shift = bool(modifiers & QtCore.Qt.ShiftModifier)
-        alt = bool(modifiers & QtCore.Qt.AltModifier)
-        ctrl_only = ctrl and not shift and not alt
+        modifiers = int(keyevt.modifiers()) & cls._MODIFIERS_MASK
         key = keyevt.key()
         #
-        cond1 = ((ctrl and shift and key == QtCore.Qt.Key_Z) or
-                 keyevt.matches(QtGui.QKeySequence.Undo) or
-                 keyevt.matches(QtGui.QKeySequence.Redo))
-        cond2 = ctrl_only and key in cls.DISABLE_CTRL_KEYS
+        cond1 = (key | modifiers) in cls.get_catch_combos()
+        # the bitmap rejects most keys before hashing into the set
+        cond2 = (modifiers == int(QtCore.Qt.ControlModifier) and
+                 (cls._DISABLE_KEYS_BITMAP >> (key & 63)) & 1 and
+                 key in cls._DISABLE_KEYS)
         #
-        result = cond1 or cond2
+        result = bool(cond1 or cond2)
         return result
 
-    def eventFilter(self, obj, evt):
+    def keyPressEvent(self, evt):
         """
         See class docstring.
         """
-        catch = False
         # documentation for keys and modifiers:
         # https://doc.qt.io/qtforpython-5/PySide2/QtCore/Qt.html
-        if evt.type() == QtCore.QEvent.KeyPress:
-            catch = self.catch_keyevent_condition(evt)
-        #
-        if catch:
+        if self.catch_keyevent_condition(evt):
             # block event but send it as signal
-            self.eventCatched.emit(evt)
-            return True
+            self.eventCatched.emit(evt.key(), int(evt.modifiers()),
+                                   evt.text())
+            evt.accept()
         else:
             # otherwise act normally
-            return super().eventFilter(obj, evt)
+            super().keyPressEvent(evt)
 
     # further functionality
     def selection_details(self):
@@ -164,9 +245,27 @@ class TextEditor(QtWidgets.QPlainTextEdit):
     def save_text(self, path):
         """
         Saves current contents of text editor to given path.
+
+        The document is written block by block (with the same conversions as
+        ``toPlainText``), so the whole text is never built as a single
+        Python string. Writing goes through a ``QSaveFile``, so the file at
+        ``path`` is replaced atomically, and only if everything was written.
+        The text is always encoded as UTF-8.
         """
-        with open(path, "w") as f:
-            f.write(self.toPlainText())
+        sf = QtCore.QSaveFile(path)
+        if not sf.open(QtCore.QIODevice.WriteOnly | QtCore.QIODevice.Text):
+            raise IOError(f"Could not open {path}: {sf.errorString()}")
+        ts = QtCore.QTextStream(sf)
+        ts.setCodec("UTF-8")
+        block = self.document().firstBlock()
+        ts << block.text().translate(self._PLAIN_TEXT_TABLE)
+        block = block.next()
+        while block.isValid():
+            ts << "\n" << block.text().translate(self._PLAIN_TEXT_TABLE)
+            block = block.next()
+        ts.flush()
+        if not sf.commit():
+            raise IOError(f"Could not save {path}: {sf.errorString()}")
 
     def save_dialog(self):
         """
@@ -202,11 +301,33 @@ class TextEditor(QtWidgets.QPlainTextEdit):
 
     def insert_textfile(self, path, delete_current=False):
         """
+        Inserts the contents of the text file at the given path at the current
+        cursor position (or replacing the whole document, if
+        ``delete_current`` is true). The insertion is done within a single
+        edit block, so it is laid out and undone as a single operation.
+
+        If there is an external undo stack, the insertion is pushed to it
+        right away as its own single ``TextDocumentUndoWrapperCommand``,
+        regardless of the file size, rather than being coalesced with any
+        pending edits. The rest of the undo history is kept.
         """
-        with open(path, "r") as f:
-            txt = f.read()
-            cursor = self.textCursor()
-            cursor.insertText(txt)
+        external = hasattr(self, "external_undo_stack")
+        if external:
+            self.flush_undo_added()
+        cursor = self.textCursor()
+        cursor.beginEditBlock()
+        try:
+            if delete_current:
+                cursor.select(QtGui.QTextCursor.Document)
+            # read and insert in chunks, so the whole file is never held
+            # as a Python string on top of the document contents
+            with open(path, "r", encoding="utf-8") as f:
+                for chunk in iter(lambda: f.read(self.INSERT_CHUNK_CHARS), ""):
+                    cursor.insertText(chunk)
+        finally:
+            cursor.endEditBlock()
+            if external:
+                self.flush_undo_added()
 
     def load_dialog(self):
         """
@@ -219,7 +340,12 @@ class TextEditor(QtWidgets.QPlainTextEdit):
 
     def change_font_size(self, pts=12):
         """
+        Sets the editor font to ``pts`` points. Since ``setFont`` relayouts
+        the whole document, nothing is done if the size doesn't change.
         """
+        if pts == self._font_pts:
+            return
         f = self.font()
         f.setPointSize(pts)
         self.setFont(f)
+        self._font_pts = pts
@@ -7,14 +7,11 @@ else in the project.
 """
 
 
-import io
 import os
-import itertools
-from pathlib import Path
-import datetime
+import struct
+from functools import lru_cache
 #
 import numpy as np
-from scipy.io import wavfile
 import randomcolor
 from PySide2 import QtGui, QtCore
 
@@ -29,8 +26,23 @@ class RandomColorGenerator(randomcolor.RandomColor):
 
     Usage example::
       r, g, b = next(RandomColorGenerator().generate(form="rgbArray"))
+
+    Construction loads and parses the whole colormap, so callers that just
+    need colors should reuse the instance returned by ``shared()``.
     """
 
+    _SHARED = None
+
+    @classmethod
+    def shared(cls):
+        """
+        :returns: A process-wide instance of this class, created upon first
+          call.
+        """
+        if cls._SHARED is None:
+            cls._SHARED = cls()
+        return cls._SHARED
+
     def generate(self, hue=None, luminosity=None, count=1, form="rgbArray"):
         """
         :param form: Popular ones: ``rgbArray, rgba, hex, rgb``
@@ -55,16 +67,32 @@ def unique_filename(path, suffix="_({})", max_iters=10000):
     Given a path, returns the same path if unique, or adds ``(N)`` before the
     extension to make it unique, for ``N`` being the lowest integer possible
     starting from 1.
+
+    Numbered paths are assumed to be taken contiguously from 1, so ``N`` is
+    found with an exponential followed by a binary search, i.e. with a
+    logarithmic number of filesystem lookups. If there are gaps in the
+    numbering, the returned path is unique but may not have the lowest ``N``.
     """
-    if not Path(path).is_file():
+    if not os.path.lexists(path):
         return path
-    else:
-        prefix, ext = os.path.splitext(path)
-        for i in itertools.count(start=1, step=1):
-            p = prefix + suffix.format(i) + ext
-            if not Path(p).is_file():
-                return p
-            assert i < max_iters, "max no. of iters reached!"
+    prefix, ext = os.path.splitext(path)
+
+    def numbered(i):
+        return prefix + suffix.format(i) + ext
+
+    # lo is known to be taken (0 stands for path), hi is the next probe
+    lo, hi = 0, 1
+    while os.path.lexists(numbered(hi)):
+        assert hi < max_iters, "max no. of iters reached!"
+        lo, hi = hi, 2 * hi
+    # lowest free index is in (lo, hi]
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if os.path.lexists(numbered(mid)):
+            lo = mid
+        else:
+            hi = mid
+    return numbered(hi)
 
 
 def seconds_to_timestamp(secs, num_decimals=2):
@@ -73,11 +101,14 @@ def seconds_to_timestamp(secs, num_decimals=2):
     ``hh:mm:ss.xx`` where ``xx`` corresponds to the number of decimals
     given at construction.
     """
-    secs, fraction = divmod(secs, 1)
-    secs_str = str(datetime.timedelta(seconds=int(secs)))
-    frac_str = ("{:." + str(num_decimals) +  "f}").format(
-        round(fraction, num_decimals))
-    result = secs_str + frac_str[1:]
+    scale = 10 ** num_decimals
+    # round once in fixed point, so e.g. 0.999 carries over into the seconds
+    whole, frac = divmod(int(round(secs * scale)), scale)
+    mins, secs = divmod(whole, 60)
+    hours, mins = divmod(mins, 60)
+    result = f"{hours}:{mins:02d}:{secs:02d}"
+    if num_decimals > 0:
+        result += f".{frac:0{num_decimals}d}"
     return result
 
 
@@ -136,26 +167,61 @@ class SavedStateTracker:
 # #############################################################################
 # ## NUMPY <-> QT_PIXMAP INTERFACING
 # #############################################################################
+# Images are converted to the raster backend's native formats (RGB32 if
+# opaque, ARGB32_Premultiplied otherwise) before creating the pixmap, so
+# fromImage can adopt them as they are
+PIXMAP_CONVERSION_FLAGS = (QtCore.Qt.NoFormatConversion |
+                           QtCore.Qt.NoOpaqueDetection)
+
+
 def rgb_arr_to_rgb_pixmap(arr):
     """
     :param arr: Expects a ``np.uint8(h, w, 3)`` array.
-    :returns: A ``QtGui.QPixmap`` in format ``RGB888(w, h)``.
+    :returns: A ``QtGui.QPixmap`` of size ``(w, h)`` in format ``RGB32``.
     """
     h, w, c = arr.shape
     assert c == 3, "Only np.uint8 arrays of shape (h, w, 3) expected!"
+    # QImage wraps the buffer without copying, so rows must be contiguous.
+    # arr must stay alive until the image is converted (which copies)
+    arr = np.ascontiguousarray(arr, dtype=np.uint8)
     img = QtGui.QImage(arr.data, w, h,
                        arr.strides[0], QtGui.QImage.Format_RGB888)
-    pm = QtGui.QPixmap.fromImage(img)
+    img = img.convertToFormat(QtGui.QImage.Format_RGB32)
+    pm = QtGui.QPixmap.fromImage(img, PIXMAP_CONVERSION_FLAGS)
     return pm
 
 
-def bool_arr_to_rgba_pixmap(arr, rgba=(255, 0, 0, 255)):
+@lru_cache(maxsize=64)
+def _rgba_arr(rgba):
+    """
+    :returns: The given ``rgba`` tuple as a read-only ``np.uint8(4)`` array.
+    """
+    arr = np.asarray(rgba, dtype=np.uint8)
+    arr.flags.writeable = False
+    return arr
+
+
+@lru_cache(maxsize=1)
+def _rgba_scratch(h, w):
+    """
+    :returns: A ``np.uint8(h, w, 4)`` buffer, reused while the requested shape
+      doesn't change. Pixmaps can only be created in the GUI thread, so
+      sharing it is safe.
+    """
+    return np.empty((h, w, 4), dtype=np.uint8)
+
+
+def bool_arr_to_rgba_pixmap(arr, rgba=(255, 0, 0, 255), out=None):
     """
     :param arr: Expects a ``np.bool(h, w)`` array.
     :param rgba: 4 values between 0 and 255. Alpha=255 means full opacity.
-    :returns: A ``QtGui.QPixmap`` in format ``RGBA8888(w, h)``, where the
-      ``false`` values are all zeros and the ``true`` values have the specified
-      ``rgba`` color.
+    :param out: Optional ``np.uint8(h, w, 4)`` scratch buffer. If not given,
+      a module-level buffer is reused across calls with the same shape. The
+      pixmap holds its own copy, so the buffer can be overwritten afterwards.
+    :returns: A ``QtGui.QPixmap`` of size ``(w, h)`` in format
+      ``ARGB32_Premultiplied``, where the ``false`` values are all zeros and
+      the ``true`` values have the specified ``rgba`` color (premultiplied
+      by its alpha).
     """
     # When painting ``(r, g, b, 0)`` Qt actually paints ``(0, 0, 0, 0)``. The
     # workaround of inverting all pixel values before and after painting
@@ -164,15 +230,18 @@ def bool_arr_to_rgba_pixmap(arr, rgba=(255, 0, 0, 255)):
     # also topic/88000/qpainter-loosing-color-of-transparent-pixels-critical
     assert rgba[-1] > 0, "Alpha can't be zero, Qt will delete all :("
     h, w = arr.shape
-    marr = np.zeros((h, w, 4), dtype=np.uint8)
-    y_idxs, x_idxs = np.where(arr)
-    marr[y_idxs, x_idxs] = rgba
+    if out is None:
+        out = _rgba_scratch(h, w)
+    # single broadcasted pass: false pixels become 0, true ones become rgba
+    marr = np.multiply(arr[..., None], _rgba_arr(tuple(rgba)),
+                       out=out, dtype=np.uint8)
     # HERE WOULD COME THE BUGFIX: try harder the "invert colors" approach?
     #
     img = QtGui.QImage(marr.data, w, h, marr.strides[0],
                        QtGui.QImage.Format_RGBA8888)
+    img = img.convertToFormat(QtGui.QImage.Format_ARGB32_Premultiplied)
     #
-    pm = QtGui.QPixmap.fromImage(img)
+    pm = QtGui.QPixmap.fromImage(img, PIXMAP_CONVERSION_FLAGS)
     return pm
 
 
@@ -190,7 +259,12 @@ def pixmap_to_arr(pm, img_format=QtGui.QImage.Format_RGBA8888):
     """
     img = pm.toImage().convertToFormat(img_format)
     w, h = img.size().toTuple()
-    arr = np.array(img.constBits()).reshape(h, w, -1)
+    row_bytes = w * (img.depth() // 8)
+    # view the image memory (rows may be padded up to bytesPerLine), and
+    # copy it once, so the result doesn't depend on img staying alive
+    bits = np.frombuffer(img.constBits(), dtype=np.uint8,
+                         count=h * img.bytesPerLine())
+    arr = bits.reshape(h, -1)[:, :row_bytes].reshape(h, w, -1).copy()
     return arr
 
 
@@ -211,6 +285,8 @@ class QStream(QtCore.QBuffer):
     """
 
     READONLY_MODE = QtCore.QIODevice.ReadOnly
+    PCM_FORMAT = 1
+    IEEE_FLOAT_FORMAT = 3
 
     def __init__(self, arr, samplerate, *args, **kwargs):
         """
@@ -218,11 +294,50 @@ class QStream(QtCore.QBuffer):
         :param samplerate: In Hz
         """
         super().__init__(*args, **kwargs)
-        # copy the array to bytes
-        self.binstream = io.BytesIO()
-        wavfile.write(self.binstream, samplerate, arr)
-        # copy the bytes to self
-        self.setData(self.binstream.getvalue())
+        # WAV data is little-endian, interleaved if multichannel
+        arr = np.ascontiguousarray(
+            arr, dtype=arr.dtype.newbyteorder("<"))
+        header = self.wav_header(arr, samplerate)
+        # header and samples are copied once into a single buffer
+        hdr_size = len(header)
+        buf = bytearray(hdr_size + arr.nbytes + (arr.nbytes % 2))
+        buf[:hdr_size] = header
+        memoryview(buf)[hdr_size:hdr_size + arr.nbytes] = arr.reshape(
+            -1).view(np.uint8)
+        self.setData(buf)
+
+    @classmethod
+    def wav_header(cls, arr, samplerate):
+        """
+        :param arr: A numpy array of shape ``(frames,)`` or
+          ``(frames, channels)``, with integer or float samples.
+        :param samplerate: In Hz
+        :returns: The bytes of a WAV header (RIFF, fmt, fact and data chunk
+          headers) for the given array, same layout as ``scipy.io.wavfile``.
+        """
+        kind, itemsize = arr.dtype.kind, arr.dtype.itemsize
+        assert kind in "iuf", f"Unsupported WAV dtype: {arr.dtype}"
+        num_frames = arr.shape[0]
+        num_channels = 1 if arr.ndim == 1 else arr.shape[1]
+        block_align = num_channels * itemsize
+        data_size = arr.nbytes
+        #
+        if kind == "f":
+            # non-PCM formats need the cbSize field and a fact chunk
+            fmt_chunk = struct.pack(
+                "<4sIHHIIHHH", b"fmt ", 18, cls.IEEE_FLOAT_FORMAT,
+                num_channels, samplerate, samplerate * block_align,
+                block_align, 8 * itemsize, 0)
+            fmt_chunk += struct.pack("<4sII", b"fact", 4, num_frames)
+        else:
+            fmt_chunk = struct.pack(
+                "<4sIHHIIHH", b"fmt ", 16, cls.PCM_FORMAT,
+                num_channels, samplerate, samplerate * block_align,
+                block_align, 8 * itemsize)
+        riff_size = 4 + len(fmt_chunk) + 8 + data_size + (data_size % 2)
+        header = (struct.pack("<4sI4s", b"RIFF", riff_size, b"WAVE") +
+                  fmt_chunk + struct.pack("<4sI", b"data", data_size))
+        return header
 
     def open(self, mode=None):
         """
@@ -242,14 +357,19 @@ def recursive_delete_qt(elt):
     everything recursively. More info::
 
       https://stackoverflow.com/a/10067548/4511978
+
+    The traversal uses an explicit stack, so arbitrarily deep trees don't
+    hit the Python recursion limit.
     """
-    is_widget = elt.widget() is not None
-    if is_widget:
-        elt.widget().setParent(None)
-    else:
-        while elt.count():
-            item = elt.takeAt(0)
-            recursive_delete_qt(item)
+    stack = [elt]
+    while stack:
+        item = stack.pop()
+        wid = item.widget()
+        if wid is not None:
+            wid.setParent(None)
+        else:
+            while item.count():
+                stack.append(item.takeAt(0))
 
 
 def change_label_font(lbl, weight=50, size_pt=None):
@@ -262,6 +382,16 @@ def change_label_font(lbl, weight=50, size_pt=None):
     lbl.setFont(fnt)
 
 
+@lru_cache(maxsize=64)
+def _padding_qss(left, right, top, bottom):
+    """
+    :returns: A stylesheet string with the given paddings in pixels. Cached,
+      since buttons typically share a handful of paddings.
+    """
+    return (f"padding-left: {left}px;padding-right: {right}px;"
+            f"padding-top: {top}px;padding-bottom: {bottom}px;")
+
+
 def resize_button(b, w_ratio=1.0, h_ratio=1.0,
                   padding_px_lrtb=(0, 0, 0, 0)):
     """
@@ -272,6 +402,4 @@ def resize_button(b, w_ratio=1.0, h_ratio=1.0,
     new_sz = QtCore.QSize(new_w, new_h)
     b.setIconSize(new_sz)
     #
-    left, right, top, bottom = padding_px_lrtb
-    b.setStyleSheet(f"padding-left: {left}px;padding-right: {right}px;"
-                    f"padding-top: {top}px;padding-bottom: {bottom}px;");
+    b.setStyleSheet(_padding_qss(*padding_px_lrtb))